@@ -0,0 +1,336 @@
+from datetime import date, datetime
+from tkinter import messagebox, filedialog
+
+from completion_store import CompletionStore
+from habit_core import HabitTracker, chart_counts
+from habit_io import iter_export, merge_chunk, open_import
+from month_view import MonthViewCache, build_month_view
+from perf import ClickTimer, PerfOverlay, monitor
+from profiles import ProfileManager, check_name
+from refresh_scheduler import RefreshScheduler
+from streaks import StreakTracker
+from worker import Worker
+from year_panel import YearPanel
+
+
+class AppController:
+    """What both frontends do beyond drawing: loading and switching data,
+    following other instances' writes, import/export, month navigation and
+    the chart updates.
+
+    A frontend calls ``init_state`` before building its widgets and
+    ``start_loading`` after, and provides ``create_widgets``,
+    ``update_grid``, ``show_month``, ``chosen_month`` (the month picked in
+    the jump-to box) and ``invalidate_grid`` (restyle every cell on the
+    next ``update_grid``), plus the widgets used here: ``profile_box``,
+    ``io_label``, ``jump_year`` and ``stats_panel``.
+    """
+
+    def init_state(self, data_file, profile, profiles_dir, watch_ms):
+        # Habit data (.csv, or .db for SQLite) is loaded on the worker thread;
+        # until it arrives the window shows an empty grid. With a profile the
+        # data is that profile's shard in profiles_dir instead of data_file.
+        self.profiles = ProfileManager(profiles_dir)
+        self.profile = profile
+        self.data_file = self.profiles.path(profile) if profile else data_file
+        self.worker = Worker(self.root)
+        self.tracker = None
+        self.habits = []
+        self.completions = CompletionStore()
+        self.streaks = StreakTracker()
+        self.current_month = datetime.now().month
+        self.current_year = datetime.now().year
+        self.grid_month = None
+        self.io_job = None
+        self.io_busy = False
+        self.watch_ms = watch_ms
+        self.watch_job = None
+        self.watch_pending = False
+
+        # Per-month view models, rebuilt only when a month is marked
+        self.month_views = MonthViewCache(
+            lambda year, month: build_month_view(year, month, self.habits, self.completions))
+
+        # Year heatmap window, opened from the navigation bar
+        self.year_panel = YearPanel(self)
+
+    def start_loading(self, data_file, profile, chart_debounce_ms):
+        # Phase timings and click-to-paint latency, see perf.py (F12 shows them)
+        self.click_timer = ClickTimer(self.root)
+        self.perf_overlay = PerfOverlay(self.root)
+
+        # Grid and charts repaint separately; chart redraws wait for clicking to pause
+        self.chart_debounce_ms = chart_debounce_ms
+        self.scheduler = RefreshScheduler(self.root)
+        self.scheduler.register('grid', self.update_grid)
+        self.scheduler.register('charts', self.update_graphs, self.chart_debounce_ms)
+        self.show_month(self.current_year, self.current_month)
+        self.update_grid()
+
+        # Import the plotting stack once the grid is on screen
+        self.root.after_idle(lambda: self.root.after(0, self.load_charts))
+
+        # Flush buffered marks before the window goes away
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Other instances may write to the same files; see watch_changes
+        self.watch_job = self.root.after(self.watch_ms, self.watch_changes)
+
+        if profile:
+            self.worker.submit(self.profiles.open, profile,
+                               callback=lambda tracker: self.profile_loaded(profile, tracker),
+                               errback=self.load_failed)
+        else:
+            self.worker.submit(HabitTracker, data_file,
+                               callback=self.tracker_loaded, errback=self.load_failed)
+
+    def load_charts(self):
+        self.stats_panel.load()
+        self.update_graphs()
+
+    # Data
+
+    def tracker_loaded(self, tracker):
+        # Writes from now on run on the worker while cells update at once
+        tracker.persist = self.save_in_background
+        tracker.start()
+        self.tracker = tracker
+        self.habits = tracker.habits
+        self.completions = tracker.completions
+        self.streaks = tracker.streaks
+        self.month_views.invalidate()
+        self.invalidate_grid()
+        self.refresh_data()
+
+    def switch_profile(self, name):
+        name = name.strip()
+        if not name or name == self.profile or self.io_busy:
+            return
+        try:
+            check_name(name)
+        except ValueError as e:
+            messagebox.showwarning("Profile", str(e))
+            self.profile_box.set(self.profile or "")
+            return
+        if self.tracker is not None and self.profile is None:
+            # The single-file tracker is not cached; close it once its writes land
+            self.worker.submit(self.tracker.close, errback=self.save_failed)
+        self.tracker = None
+        self.profile = name
+        self.data_file = self.profiles.path(name)
+        # Cached profiles come straight back; new ones load on the worker
+        self.worker.submit(self.profiles.open, name,
+                           callback=lambda tracker: self.profile_loaded(name, tracker),
+                           errback=self.load_failed)
+
+    def profile_loaded(self, name, tracker):
+        if name != self.profile:
+            # Superseded by a later switch
+            return
+        self.profile_box.configure(values=self.profiles.names())
+        self.tracker_loaded(tracker)
+
+    def watch_changes(self):
+        # Another window on the same data: its new records are read on the
+        # worker (a stat when there are none) and applied here
+        self.watch_job = self.root.after(self.watch_ms, self.watch_changes)
+        if self.tracker is None:
+            return
+        # Buffered marks that failed to reach disk are retried, but say so
+        error = self.tracker.storage.take_write_error()
+        if error is not None:
+            self.save_failed(error)
+        if self.watch_pending:
+            return
+        self.watch_pending = True
+        tracker = self.tracker
+        self.worker.submit(tracker.storage.changes,
+                           callback=lambda changes: self.changes_loaded(tracker, changes),
+                           errback=self.watch_failed)
+
+    def changes_loaded(self, tracker, changes):
+        if tracker is self.tracker and changes is not None and changes[1] is None:
+            # Too much was missed to apply record by record; the history is
+            # read again on the worker, and polling waits until it is in
+            habits, _ = changes
+            tracker.apply_changes((habits, []))
+            self.reload_index(tracker)
+            return
+        self.watch_pending = False
+        if tracker is self.tracker and tracker.apply_changes(changes):
+            self.changes_applied()
+
+    def reload_index(self, tracker):
+        version = tracker.completions.version
+        self.worker.submit(tracker.load_index,
+                           callback=lambda index: self.index_loaded(tracker, version, index),
+                           errback=self.watch_failed)
+
+    def index_loaded(self, tracker, version, index):
+        if tracker is self.tracker and tracker.completions.version != version:
+            # A click landed meanwhile and may be missing from the load; its
+            # write is queued by now, so a second load will have it
+            self.reload_index(tracker)
+            return
+        self.watch_pending = False
+        if tracker is self.tracker:
+            tracker.swap_index(index)
+            self.changes_applied()
+
+    def changes_applied(self):
+        self.month_views.invalidate()
+        self.invalidate_grid()
+        self.refresh_data()
+
+    def watch_failed(self, error):
+        # Usually a file caught mid-replace; the next poll tries again
+        self.watch_pending = False
+
+    def load_failed(self, error):
+        messagebox.showerror("Load failed", f"Could not read {self.data_file}: {error}")
+
+    def save_in_background(self, fn, *args):
+        self.worker.submit(fn, *args, errback=self.save_failed)
+
+    def save_failed(self, error):
+        messagebox.showerror("Save failed", f"Could not write to {self.data_file}: {error}")
+
+    def on_close(self):
+        if self.io_job is not None:
+            self.root.after_cancel(self.io_job)
+        if self.watch_job is not None:
+            self.root.after_cancel(self.watch_job)
+        # Let queued writes land before the files are closed
+        self.worker.shutdown()
+        if self.tracker is not None and self.profile is None:
+            self.tracker.close()
+        self.profiles.close()
+        monitor.finish()
+        self.root.destroy()
+
+    # Import and export
+
+    def import_history(self):
+        path = filedialog.askopenfilename(
+            title="Import history",
+            filetypes=[("Habit history", "*.csv *.jsonl *.ndjson"), ("All files", "*.*")])
+        if path and self.start_io():
+            try:
+                chunks, progress = open_import(path)
+            except OSError as e:
+                self.io_failed("Importing", e)
+                return
+            self.read_chunk(chunks, progress)
+
+    def read_chunk(self, chunks, progress):
+        # Parsing runs on the worker; merging into the indexes stays on this thread
+        self.worker.submit(next, chunks, None,
+                           callback=lambda chunk: self.import_chunk(chunks, progress, chunk),
+                           errback=lambda e: self.io_failed("Importing", e))
+
+    def import_chunk(self, chunks, progress, chunk):
+        if chunk is None:
+            self.finish_io("Importing", progress)
+            return
+        merge_chunk(self.tracker, progress, chunk)
+        self.io_label.configure(text=f"Importing {progress.fraction:.0%}")
+        self.read_chunk(chunks, progress)
+
+    def export_history(self):
+        path = filedialog.asksaveasfilename(
+            title="Export history", defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON lines", "*.jsonl")])
+        if path and self.start_io():
+            self.step_export(iter_export(self.tracker, path), None)
+
+    def start_io(self):
+        if self.tracker is None:
+            return False
+        if self.io_busy:
+            messagebox.showwarning("Busy", "An import or export is already running")
+            return False
+        self.io_busy = True
+        return True
+
+    def step_export(self, steps, progress):
+        """Write one export chunk per event-loop turn so the window stays live"""
+        self.io_job = None
+        try:
+            progress = next(steps)
+        except StopIteration:
+            self.finish_io("Exporting", progress)
+            return
+        except (OSError, ValueError) as e:
+            self.io_failed("Exporting", e)
+            return
+        self.io_label.configure(text=f"Exporting {progress.fraction:.0%}")
+        self.io_job = self.root.after(1, self.step_export, steps, progress)
+
+    def io_failed(self, verb, error):
+        self.io_label.configure(text="")
+        messagebox.showerror(f"{verb} failed", str(error))
+        self.finish_io(verb, None)
+
+    def finish_io(self, verb, progress):
+        self.io_busy = False
+        if progress is not None:
+            if verb == "Importing":
+                text = f"Imported {progress.added} marks ({progress.skipped} skipped)"
+            else:
+                text = f"Exported {progress.rows} rows"
+            self.io_label.configure(text=text)
+        # Imported marks can land in any month
+        self.month_views.invalidate()
+        self.refresh_data()
+
+    # Display
+
+    def wrap_text(self, text, max_length=15):
+        """Wrap text if it exceeds max_length"""
+        if len(text) <= max_length:
+            return text
+        return text[:max_length-2] + ".."
+
+    def refresh_data(self):
+        self.scheduler.mark_dirty('grid', 'charts')
+
+    def shift_month(self, delta):
+        index = self.current_year * 12 + self.current_month - 1 + delta
+        self.show_month(index // 12, index % 12 + 1)
+
+    def show_today(self):
+        self.show_month(datetime.now().year, datetime.now().month)
+
+    def jump_to_month(self):
+        try:
+            year = int(self.jump_year.get())
+        except ValueError:
+            messagebox.showwarning("Input Error", "Year must be a number")
+            return
+        if not 1 <= year <= 9999:
+            messagebox.showwarning("Input Error", "Year is out of range")
+            return
+        self.show_month(year, self.chosen_month())
+
+    def progress_color(self, progress):
+        return self.danger if progress < 30 else self.warning if progress < 70 else self.success
+
+    def update_graphs(self):
+        # An open year view follows the same changes as the charts
+        self.year_panel.refresh()
+        if not self.stats_panel.ready or self.tracker is None:
+            return
+
+        # Nothing the charts show has changed since they were drawn
+        data_key = (self.tracker, self.tracker.version, self.current_year,
+                    self.current_month, date.today())
+        if self.stats_panel.shows(data_key):
+            return
+
+        # Counted on the worker from a frozen copy; drawing stays on this thread
+        habits = list(self.habits)
+        streaks = self.tracker.streak_table()
+        self.worker.submit(chart_counts, self.completions.frozen(), habits,
+                           self.current_year, self.current_month,
+                           callback=lambda counts: self.stats_panel.draw(
+                               habits, counts[0], counts[1], counts[1], streaks, data_key))
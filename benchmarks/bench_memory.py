@@ -0,0 +1,105 @@
+"""Memory and lookup cost of the completion index: dict/tuple layouts vs bitsets.
+
+    python benchmarks/bench_memory.py [--habits N] [--years Y] [--density D]
+"""
+import argparse
+import calendar
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from completion_store import CompletionStore  # noqa: E402
+from habit_registry import Habit  # noqa: E402
+from synthetic import generate_rows  # noqa: E402
+
+
+def string_dict_layout(rows):
+    """refresh_data's original completion_data plus {'name', 'goal'} dicts"""
+    habits = [{'name': r['habit'], 'goal': r['goal']} for r in rows if not r['date']]
+    completion_data = {(r['habit'], r['date']): True for r in rows if r['date']}
+    return habits, completion_data
+
+
+def tuple_set_layout(rows):
+    """The (habit, date) set and sorted per-habit date lists"""
+    habits = [{'name': r['habit'], 'goal': r['goal']} for r in rows if not r['date']]
+    completed = set()
+    dates_by_habit = {}
+    for r in rows:
+        if r['date']:
+            key = (r['habit'], datetime.strptime(r['date'], "%Y-%m-%d").date())
+            completed.add(key)
+            dates_by_habit.setdefault(r['habit'], []).append(key[1])
+    return habits, completed, dates_by_habit
+
+
+def bitset_layout(rows):
+    habits = [Habit(r['habit'], r['goal']) for r in rows if not r['date']]
+    store = CompletionStore()
+    store.load((r['habit'], r['date']) for r in rows if r['date'])
+    return habits, store
+
+
+def measure(build, rows):
+    """Bytes still allocated by ``build(rows)``'s result"""
+    gc.collect()
+    tracemalloc.start()
+    result = build(rows)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+
+def month_probe_strings(habits, completion_data, year, month):
+    """One dict probe per habit and day, with strftime, as refresh_data did"""
+    days = calendar.monthrange(year, month)[1]
+    return {h['name']: sum(1 for day in range(1, days + 1)
+                          if (h['name'], date(year, month, day).strftime("%Y-%m-%d")) in completion_data)
+            for h in habits}
+
+
+def month_probe_bits(habits, store, year, month):
+    days = calendar.monthrange(year, month)[1]
+    return {h.name: store.count_between(h.name, date(year, month, 1), date(year, month, days))
+            for h in habits}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, default=300)
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--density", type=float, default=0.6)
+    args = parser.parse_args()
+
+    rows = list(generate_rows(args.habits, args.years, args.density))
+    marks = sum(1 for r in rows if r['date'])
+    print(f"{marks} marks, {args.habits} habits, {args.years} years")
+
+    string_size, (habits, completion_data) = measure(string_dict_layout, rows)
+    tuple_size, _ = measure(tuple_set_layout, rows)
+    bits_size, (records, store) = measure(bitset_layout, rows)
+    for label, size in (("string-key dict", string_size), ("tuple set + lists", tuple_size),
+                        ("bitsets", bits_size)):
+        print(f"{label:18} {size / 1e6:8.2f} MB  {size / marks:6.1f} B/mark")
+
+    today = date.today()
+    start = time.perf_counter()
+    expected = month_probe_strings(habits, completion_data, today.year, today.month)
+    strings_time = time.perf_counter() - start
+    start = time.perf_counter()
+    result = month_probe_bits(records, store, today.year, today.month)
+    bits_time = time.perf_counter() - start
+    assert result == expected, "month counts differ"
+    print(f"month counts: strftime probes {strings_time * 1000:.1f} ms, "
+          f"bitset popcount {bits_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Load test for habit_server.py against a local copy of synthetic data.
+
+Starts the server in a child process, then runs concurrent keep-alive
+clients against it. Each client mostly reads stats (revalidating with
+If-None-Match, like a phone polling for progress) and sometimes marks or
+unmarks a day.
+
+    python benchmarks/bench_server.py [--clients 50] [--requests 200] [--write-share 0.1]
+                                      [--habits N] [--years Y]
+
+Prints throughput, latency percentiles and the share of 304 responses.
+"""
+import argparse
+import asyncio
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from perf import percentile  # noqa: E402
+from synthetic import write_csv  # noqa: E402
+
+READS = ["/stats/month", "/stats/recent?days=7", "/stats/charts", "/habits"]
+
+
+async def request(reader, writer, method, target, etag=None):
+    """One keep-alive request; returns (status, etag)"""
+    head = [f"{method} {target} HTTP/1.1", "Host: localhost"]
+    if etag:
+        head.append(f"If-None-Match: {etag}")
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1'))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    if length:
+        await reader.readexactly(length)
+    return status, headers.get('etag')
+
+
+async def client(port, habits, count, write_share, seed, latencies, statuses):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    etags = {}
+    today = date.today()
+    for _ in range(count):
+        if rng.random() < write_share:
+            day = today - timedelta(days=rng.randrange(60))
+            method = rng.choice(("POST", "DELETE"))
+            target = f"/habits/{rng.choice(habits)}/marks/{day.isoformat()}"
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, method, target)
+            kind = "write"
+        else:
+            target = rng.choice(READS)
+            start = time.perf_counter()
+            status, etag = await request(reader, writer, "GET", target, etags.get(target))
+            if etag:
+                etags[target] = etag
+            kind = "read"
+        latencies.append(time.perf_counter() - start)
+        statuses[kind, status] = statuses.get((kind, status), 0) + 1
+    writer.close()
+
+
+async def load(port, habits, clients, count, write_share):
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, habits, count, write_share, seed, latencies, statuses)
+                           for seed in range(clients)))
+    return time.perf_counter() - start, latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--write-share", type=float, default=0.1)
+    parser.add_argument("--habits", type=int, default=100)
+    parser.add_argument("--years", type=float, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = os.path.join(tmp, "habits_data.csv")
+        rows = write_csv(data_file, habits=args.habits, years=args.years)
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "habit_server.py"), "--data", data_file,
+             "--port", "0"], stdout=subprocess.PIPE, text=True)
+        try:
+            line = server.stdout.readline()
+            if not line.startswith("serving on"):
+                sys.exit("server did not start")
+            port = int(line.rsplit(":", 1)[1])
+            from habit_core import HabitTracker
+            reader = HabitTracker(data_file)
+            habits = [h.name for h in reader.habits]
+            reader.storage.close()
+
+            elapsed, latencies, statuses = asyncio.run(
+                load(port, habits, args.clients, args.requests, args.write_share))
+        finally:
+            server.send_signal(signal.SIGINT if hasattr(signal, "SIGINT") else signal.SIGTERM)
+            server.wait(timeout=30)
+
+    total = len(latencies)
+    print(f"{rows} rows, {args.habits} habits; {args.clients} clients x {args.requests} requests")
+    print(f"{total / elapsed:10.0f} requests/s")
+    for pct in (50, 95, 99):
+        print(f"  p{pct:<3} {percentile(latencies, pct) * 1000:8.2f} ms")
+    print("  status " + ", ".join(f"{kind} {code}: {n}" for (kind, code), n in sorted(statuses.items())))
+    reads = sum(n for (kind, _), n in statuses.items() if kind == "read")
+    print(f"  304 share of reads {statuses.get(('read', 304), 0) / max(reads, 1):.1%}")
+
+
+if __name__ == "__main__":
+    main()
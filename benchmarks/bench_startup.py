@@ -0,0 +1,74 @@
+"""Time-to-first-paint of the GUI, with and without lazy chart loading.
+
+Each sample runs in a fresh interpreter so import costs are counted. In
+"eager" mode the chart panel is loaded before the first paint, which is
+what the app did before the plotting stack became lazy.
+
+    python benchmarks/bench_startup.py [--frontend main|concept] [--runs N]
+
+Needs a display (use xvfb-run on a headless machine).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(frontend, mode, data_file):
+    start = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    module = __import__(frontend)
+    if frontend == "concept":
+        root = module.ctk.CTk()
+    else:
+        root = module.tk.Tk()
+    if mode == "eager":
+        # Load charts up front, before the first paint
+        original = module.StatsPanel.__init__
+
+        def eager_init(self, *args, **kwargs):
+            original(self, *args, **kwargs)
+            self.load()
+        module.StatsPanel.__init__ = eager_init
+    app = module.HabitTrackerApp(root, data_file)
+    root.update()
+    first_paint = time.perf_counter() - start
+    app.on_close()
+    print(f"{first_paint:.6f}")
+
+
+def run(frontend, mode, data_file):
+    out = subprocess.run([sys.executable, __file__, "--child", mode, "--frontend", frontend,
+                          "--data", data_file],
+                         check=True, capture_output=True, text=True).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frontend", choices=["main", "concept"], default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--data", help="habits file to open (default: empty temp file)")
+    parser.add_argument("--child", choices=["lazy", "eager"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.frontend, args.child, args.data)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = args.data or os.path.join(tmp, "habits_data.csv")
+        for mode in ("eager", "lazy"):
+            samples = [run(args.frontend, mode, data_file) for _ in range(args.runs)]
+            print(f"{args.frontend:8s} {mode:6s} first paint: "
+                  f"median {statistics.median(samples) * 1000:7.1f} ms  "
+                  f"min {min(samples) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
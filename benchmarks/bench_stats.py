@@ -0,0 +1,81 @@
+"""Monthly progress / last-3-days aggregation: row loop vs the bitset counts.
+
+    python benchmarks/bench_stats.py [--habits N] [--years Y] [--density D]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from habit_core import HabitTracker, chart_counts  # noqa: E402
+from synthetic import generate_rows, write_csv  # noqa: E402
+
+
+def row_loop(rows, year, month):
+    """The per-row aggregation update_graphs used to run over the CSV"""
+    monthly_progress = {}
+    last_3_days = {}
+    for row in rows:
+        if row['habit'] and row['date']:
+            habit = row['habit']
+            date = datetime.strptime(row['date'], "%Y-%m-%d")
+            if date.month == month and date.year == year:
+                monthly_progress[habit] = monthly_progress.get(habit, 0) + 1
+            days_ago = (datetime.now() - date).days
+            if days_ago <= 3:
+                last_3_days[habit] = last_3_days.get(habit, 0) + 1
+    return monthly_progress, last_3_days
+
+
+def timed(fn, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, default=300)
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--density", type=float, default=0.6)
+    args = parser.parse_args()
+
+    scale = dict(habits=args.habits, years=args.years, density=args.density)
+    rows = list(generate_rows(**scale))
+    now = datetime.now()
+    print(f"{len(rows)} rows, {args.habits} habits, {args.years} years")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = os.path.join(tmp, "habits_data.csv")
+        write_csv(data_file, **scale)
+        build, tracker = timed(HabitTracker, data_file, repeat=1)
+        try:
+            loop_time, expected = timed(row_loop, rows, now.year, now.month)
+            counts_time, result = timed(chart_counts, tracker.completions, tracker.habits,
+                                        now.year, now.month)
+            assert result == expected, "aggregates differ"
+            frozen_time, _ = timed(tracker.completions.frozen)
+            report_time, _ = timed(tracker.month_report, now.year, now.month)
+            streak_time, _ = timed(tracker.streak_table)
+        finally:
+            tracker.storage.close()
+
+    print(f"index load        {build * 1000:9.1f} ms (once at startup)")
+    print(f"row loop          {loop_time * 1000:9.1f} ms per refresh")
+    print(f"chart_counts      {counts_time * 1000:9.1f} ms per refresh")
+    print(f"frozen copy       {frozen_time * 1000:9.1f} ms (for the worker)")
+    print(f"month_report      {report_time * 1000:9.1f} ms")
+    print(f"streak table      {streak_time * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""Benchmark suite: headless core timings plus both GUI frontends.
+
+Generates a synthetic habits_data.csv at the requested scale, times loading,
+a mark round-trip, the grid refresh and the chart update, and writes the
+fastest of ``--repeat`` runs of each (in seconds) to a JSON file, or the
+fastest over ``--runs`` whole suites. With ``--baseline`` the run is compared
+against a stored result and exits with status 1 if any timing regressed by
+more than ``--threshold`` (and by at least ``--min-delta-ms``, so noise on
+sub-millisecond timings does not fail the run). Timings on a busy machine
+vary by tens of percent between runs, so while any is over the threshold the
+whole suite is measured again, up to ``--retries`` times, keeping the
+fastest; a real regression stays slow every time.
+
+    python benchmarks/run_suite.py [--habits N] [--years Y] [--density D]
+                                   [--out results.json] [--baseline benchmarks/baseline.json]
+                                   [--threshold 0.25] [--min-delta-ms 1] [--runs 1]
+                                   [--retries 2] [--no-gui]
+
+GUI timings need a display. Without one the GUI part is re-run under
+``xvfb-run`` when it is installed, and skipped otherwise. The stored
+baseline was recorded headless, so against it GUI timings are only
+reported; record one with a display (``--runs 3 --out
+benchmarks/baseline.json``) to check them too. Timings missing from the
+baseline are listed as not checked.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import write_csv  # noqa: E402
+
+FRONTENDS = ("main", "concept")
+
+
+def best_time(fn, repeat, setup=None):
+    """Fastest of ``repeat`` runs; slow runs are mostly other load on the machine"""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+
+def unmarked_days(tracker, count):
+    """(habit, day) pairs in the current month that are not completed yet"""
+    today = date.today()
+    first = today.replace(day=1)
+    pairs = []
+    for habit in tracker.habits:
+        day = first
+        while day.month == today.month and len(pairs) < count:
+            if not tracker.completions.is_completed(habit.name, day):
+                pairs.append((habit.name, day))
+                break
+            day += timedelta(days=1)
+        if len(pairs) == count:
+            break
+    return pairs
+
+
+# Headless
+
+def core_suite(data_file, repeat):
+    from habit_core import HabitTracker
+    from month_view import build_month_view
+    from storage import migrate_csv_to_sqlite
+    from year_view import YearMatrix
+
+    results = {}
+    snapshot_file = data_file + ".hbs"
+
+    def load_cold():
+        if os.path.exists(snapshot_file):
+            os.remove(snapshot_file)
+        HabitTracker(data_file).storage.close()
+    results['core.load_csv'] = best_time(load_cold, repeat)
+
+    tracker = HabitTracker(data_file)
+    tracker.close()
+    results['core.load_snapshot'] = best_time(
+        lambda: HabitTracker(data_file).storage.close(), repeat)
+
+    db_file = os.path.splitext(data_file)[0] + ".db"
+    migrate_csv_to_sqlite(data_file, db_file)
+    results['core.load_sqlite'] = best_time(
+        lambda: HabitTracker(db_file).storage.close(), repeat)
+
+    # Side log left by heavy toggling: mark, unmark and mark again per day
+    toggled_file = data_file + ".toggled.csv"
+    shutil.copyfile(data_file, toggled_file)
+    tracker = HabitTracker(toggled_file)
+    for habit_name, day in unmarked_days(tracker, len(tracker.habits)):
+        for _ in range(3):
+            tracker.toggle(habit_name, day)
+    tracker.storage.close()
+    results['core.load_csv_toggled'] = best_time(
+        lambda: HabitTracker(toggled_file).storage.close(), repeat)
+
+    today = date.today()
+    tracker = HabitTracker(data_file)
+    pairs = iter(unmarked_days(tracker, repeat))
+
+    def mark_roundtrip():
+        # Index update, durable write and the month view the grid repaints from
+        habit_name, day = next(pairs)
+        tracker.mark(habit_name, day)
+        tracker.storage.log.flush()
+        build_month_view(day.year, day.month, tracker.habits, tracker.completions)
+    results['core.mark_roundtrip'] = best_time(mark_roundtrip, min(repeat, len(tracker.habits)))
+    results['core.month_view'] = best_time(
+        lambda: build_month_view(today.year, today.month, tracker.habits, tracker.completions),
+        repeat)
+    results['core.chart_data'] = best_time(
+        lambda: tracker.chart_data(today.year, today.month), repeat)
+    results['core.month_report'] = best_time(
+        lambda: tracker.month_report(today.year, today.month), repeat)
+
+    def year_matrix():
+        YearMatrix(today.year).update(tracker.habits, tracker.completions)
+    results['core.year_matrix'] = best_time(year_matrix, repeat)
+    matrix = YearMatrix(today.year)
+    matrix.update(tracker.habits, tracker.completions)
+    habit_name = tracker.habits[0].name
+
+    def year_matrix_update():
+        # What the year view does after a click: one row unpacked again
+        tracker.toggle(habit_name, today)
+        matrix.update(tracker.habits, tracker.completions)
+    results['core.year_matrix_update'] = best_time(year_matrix_update, repeat)
+    tracker.close()
+    return results
+
+
+# GUI (runs in a child process per frontend)
+
+def pump(root, until, timeout=60.0):
+    deadline = time.perf_counter() + timeout
+    while not until():
+        if time.perf_counter() > deadline:
+            raise RuntimeError("timed out waiting for the GUI")
+        root.update()
+
+
+def gui_child(frontend, data_file, repeat):
+    start = time.perf_counter()
+    module = __import__(frontend)
+    root = module.ctk.CTk() if frontend == "concept" else module.tk.Tk()
+    app = module.HabitTrackerApp(root, data_file)
+    root.update()
+    results = {'startup_first_paint': time.perf_counter() - start}
+
+    pump(root, lambda: app.tracker is not None and not app.worker.busy())
+    app.scheduler.flush()
+    root.update_idletasks()
+    results['startup_loaded'] = time.perf_counter() - start
+
+    def refresh():
+        app.refresh_data()
+        app.scheduler.flush('grid')
+        root.update_idletasks()
+    results['refresh_data'] = best_time(refresh, repeat)
+
+    pairs = iter(unmarked_days(app.tracker, repeat))
+    extra = (None,) if frontend == "concept" else ()
+
+    def mark():
+        habit_name, day = next(pairs)
+        app.mark_habit(habit_name, day, *extra)
+        root.update_idletasks()
+    results['mark_habit'] = best_time(mark, min(repeat, len(app.habits)))
+
+    app.stats_panel.load()
+
+    def painted():
+        return not app.worker.busy() and app.stats_panel.painted
+
+    # One new mark per run, so every update draws numbers not seen before
+    pairs = unmarked_days(app.tracker, repeat + 1)
+    marks = iter(pairs)
+
+    def graphs():
+        # Counts on the worker, then the idle draw update_graphs schedules
+        app.tracker.mark(*next(marks))
+        app.update_graphs()
+        pump(root, painted)
+    graphs()
+    results['update_graphs'] = best_time(graphs, len(pairs) - 1)
+
+    habit_name = app.habits[0].name
+    far = date(app.current_year - 30, 1, 1)
+
+    def graphs_unchanged():
+        # A mark the charts do not show: counted again, the image on screen kept
+        app.tracker.toggle(habit_name, far)
+        app.update_graphs()
+        pump(root, lambda: not app.worker.busy())
+        root.update_idletasks()
+    results['update_graphs_unchanged'] = best_time(graphs_unchanged, repeat)
+
+    this_month = app.current_year, app.current_month
+    index = app.current_year * 12 + app.current_month - 2
+    last_month = index // 12, index % 12 + 1
+
+    def show_charts(year, month):
+        app.current_year, app.current_month = year, month
+        app.update_graphs()
+        pump(root, painted)
+
+    def graphs_cached():
+        # Back to a month drawn before: its image is copied from the cache
+        show_charts(*this_month)
+        root.update_idletasks()
+    results['update_graphs_cached'] = best_time(
+        graphs_cached, repeat, setup=lambda: show_charts(*last_month))
+
+    app.on_close()
+    print(json.dumps({f"{frontend}.{k}": v for k, v in results.items()}))
+
+
+def has_display():
+    return sys.platform in ("win32", "darwin") or bool(os.environ.get("DISPLAY"))
+
+
+def gui_suite(data_file, repeat):
+    prefix = []
+    if not has_display():
+        xvfb = shutil.which("xvfb-run")
+        if xvfb is None:
+            return {}, "no display and xvfb-run is not installed"
+        prefix = [xvfb, "-a"]
+    results = {}
+    for frontend in FRONTENDS:
+        # Each frontend starts from the same file, with no snapshot
+        work_file = data_file + f".{frontend}.csv"
+        shutil.copyfile(data_file, work_file)
+        out = subprocess.run(prefix + [sys.executable, __file__, "--gui-child", frontend,
+                                       "--data", work_file, "--repeat", str(repeat)],
+                             check=True, capture_output=True, text=True, cwd=ROOT).stdout
+        results.update(json.loads(out.strip().splitlines()[-1]))
+    return results, None
+
+
+# Baseline comparison
+
+def compare(results, baseline, threshold, min_delta):
+    """Lines describing each shared timing, and the names that regressed"""
+    lines, regressed = [], []
+    for name in sorted(results):
+        if name not in baseline:
+            lines.append(f"{name:32} not in the baseline, not checked")
+            continue
+        old, new = baseline[name], results[name]
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > threshold and new - old >= min_delta:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        lines.append(f"{name:32} {old * 1000:9.2f} -> {new * 1000:9.2f} ms  {change:+7.1%}{flag}")
+    return lines, regressed
+
+
+def measure(args):
+    """(rows, timings, why GUI timings were skipped) for one run on fresh data"""
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = os.path.join(tmp, "habits_data.csv")
+        rows = write_csv(data_file, habits=args.habits, years=args.years, density=args.density)
+        print(f"{rows} rows, {args.habits} habits, {args.years} years, density {args.density}")
+        results = core_suite(data_file, args.repeat)
+        skipped = "disabled with --no-gui"
+        if not args.no_gui:
+            gui_results, skipped = gui_suite(data_file, args.repeat)
+            results.update(gui_results)
+    return rows, results, skipped
+
+
+def keep_fastest(results, more):
+    for name, value in more.items():
+        results[name] = min(results.get(name, value), value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, default=100)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--density", type=float, default=0.6)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown before a timing counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="ignore slowdowns smaller than this many milliseconds")
+    parser.add_argument("--runs", type=int, default=1,
+                        help="measure this many times and keep each timing's fastest")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="times to measure again while some timing is over the threshold")
+    parser.add_argument("--no-gui", action="store_true", help="headless timings only")
+    parser.add_argument("--gui-child", choices=FRONTENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.gui_child:
+        gui_child(args.gui_child, args.data, args.repeat)
+        return
+
+    rows, results, skipped = measure(args)
+    for _ in range(args.runs - 1):
+        keep_fastest(results, measure(args)[1])
+
+    regressed, lines = [], []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('scale', {}).get('rows') != rows:
+            print("warning: baseline was recorded at a different scale")
+        min_delta = args.min_delta_ms / 1000
+        lines, regressed = compare(results, baseline['results'], args.threshold, min_delta)
+        for retry in range(args.retries):
+            if not regressed:
+                break
+            # A slow spell on the machine looks like a regression; measure again
+            print(f"{len(regressed)} timing(s) over the threshold, measuring again "
+                  f"({retry + 1}/{args.retries})")
+            keep_fastest(results, measure(args)[1])
+            lines, regressed = compare(results, baseline['results'], args.threshold, min_delta)
+
+    for name in sorted(results):
+        print(f"{name:32} {results[name] * 1000:9.2f} ms")
+    if skipped:
+        print(f"GUI timings skipped: {skipped}")
+
+    report = {
+        'scale': {'habits': args.habits, 'years': args.years, 'density': args.density,
+                  'rows': rows},
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"results written to {args.out}")
+
+    if lines:
+        print("\n".join(lines))
+    if regressed:
+        print(f"{len(regressed)} timing(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Synthetic habit histories for the benchmarks."""
+import csv
+import random
+from datetime import date, timedelta
+
+
+def generate_rows(habits=200, years=3, density=0.6, seed=0, end=None):
+    """Yield CSV-schema rows: one definition row per habit, then its marks"""
+    rng = random.Random(seed)
+    end = end or date.today()
+    days = int(years * 365)
+    start = end - timedelta(days=days - 1)
+    for h in range(habits):
+        name = f"habit-{h:04d}"
+        goal = rng.randint(5, 31)
+        yield {'habit': name, 'goal': goal, 'date': '', 'completed': ''}
+        for offset in range(days):
+            if rng.random() < density:
+                day = start + timedelta(days=offset)
+                yield {'habit': name, 'goal': goal, 'date': day.isoformat(), 'completed': 1}
+
+
+def write_csv(path, **kwargs):
+    """Write a synthetic habits_data.csv and return the number of rows"""
+    count = 0
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['habit', 'goal', 'date', 'completed'])
+        writer.writeheader()
+        for row in generate_rows(**kwargs):
+            writer.writerow(row)
+            count += 1
+    return count
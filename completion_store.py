@@ -0,0 +1,196 @@
+from datetime import date, datetime
+
+
+def as_date(value):
+    """Normalise a datetime or 'YYYY-MM-DD' string to a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def popcount(bits):
+    return bin(bits).count("1")
+
+
+class HabitBits:
+    """Completed days of one habit as an int bitset; bit i is day ``origin + i``"""
+
+    __slots__ = ('origin', 'bits')
+
+    def __init__(self, origin):
+        self.origin = origin
+        self.bits = 0
+
+    @classmethod
+    def from_ordinals(cls, ordinals):
+        """Build from day ordinals in any order, with duplicates allowed"""
+        ordinals = list(ordinals)
+        habit_bits = cls(min(ordinals) if ordinals else 0)
+        if ordinals:
+            bitmap = bytearray((max(ordinals) - habit_bits.origin) // 8 + 1)
+            for ordinal in ordinals:
+                offset = ordinal - habit_bits.origin
+                bitmap[offset >> 3] |= 1 << (offset & 7)
+            habit_bits.bits = int.from_bytes(bitmap, 'little')
+        return habit_bits
+
+    def copy(self):
+        habit_bits = HabitBits(self.origin)
+        habit_bits.bits = self.bits
+        return habit_bits
+
+    def add(self, ordinal):
+        """Set one day; returns False if it was already set"""
+        if ordinal < self.origin:
+            # Re-base so the new day is bit 0
+            self.bits <<= self.origin - ordinal
+            self.origin = ordinal
+        mask = 1 << (ordinal - self.origin)
+        if self.bits & mask:
+            return False
+        self.bits |= mask
+        return True
+
+    def remove(self, ordinal):
+        """Clear one day; returns False if it was not set"""
+        if ordinal not in self:
+            return False
+        self.bits &= ~(1 << (ordinal - self.origin))
+        return True
+
+    def __contains__(self, ordinal):
+        return ordinal >= self.origin and (self.bits >> (ordinal - self.origin)) & 1 == 1
+
+    def __len__(self):
+        return popcount(self.bits)
+
+    def slice(self, lo, hi):
+        """Bits for ordinals lo..hi inclusive, shifted so ``lo`` is bit 0"""
+        if hi < lo:
+            return 0
+        shift = lo - self.origin
+        bits = self.bits >> shift if shift >= 0 else self.bits << -shift
+        return bits & ((1 << (hi - lo + 1)) - 1)
+
+    def count(self, lo=None, hi=None):
+        """Completed days with lo <= ordinal <= hi (either end may be open)"""
+        if lo is None and hi is None:
+            return popcount(self.bits)
+        lo = self.origin if lo is None else lo
+        hi = self.origin + self.bits.bit_length() if hi is None else hi
+        return popcount(self.slice(lo, hi))
+
+    def ordinals(self):
+        """Completed day ordinals, ascending"""
+        origin = self.origin
+        return [origin + i for i, bit in enumerate(bin(self.bits)[:1:-1]) if bit == "1"]
+
+
+class CompletionStore:
+    """In-memory index of completed habit days, loaded once and kept current.
+
+    Each habit's history is a HabitBits int bitset, so a mark is one OR, a
+    month is one shift-and-mask and any range count is a popcount.
+    """
+
+    def __init__(self):
+        # habit -> HabitBits
+        self.by_habit = {}
+        # Bumped on every change, so caches of derived data can tell they are stale
+        self.version = 0
+
+    def clear(self):
+        self.by_habit.clear()
+        self.version += 1
+
+    def load(self, completions):
+        """Index an iterable of (habit, date) pairs from storage"""
+        ordinals = {}
+        for habit_name, day in completions:
+            ordinals.setdefault(habit_name, []).append(as_date(day).toordinal())
+        self.by_habit.clear()
+        for habit_name, days in ordinals.items():
+            self.load_ordinals(habit_name, days)
+        self.version += 1
+
+    def replace(self, other):
+        """Take over the contents of another store, e.g. one loaded on a
+        worker thread, keeping this object for whoever holds it"""
+        self.by_habit = other.by_habit
+        self.version += 1
+
+    def load_ordinals(self, habit_name, ordinals):
+        """Replace one habit's history with a sequence of day ordinals"""
+        self.by_habit[habit_name] = HabitBits.from_ordinals(ordinals)
+        self.version += 1
+
+    def add(self, habit_name, day):
+        """Record a completion, returns False if it was already recorded"""
+        ordinal = as_date(day).toordinal()
+        habit_bits = self.by_habit.get(habit_name)
+        if habit_bits is None:
+            habit_bits = self.by_habit[habit_name] = HabitBits(ordinal)
+        if not habit_bits.add(ordinal):
+            return False
+        self.version += 1
+        return True
+
+    def remove(self, habit_name, day):
+        """Drop a completion, returns False if it was not recorded"""
+        habit_bits = self.by_habit.get(habit_name)
+        if habit_bits is None or not habit_bits.remove(as_date(day).toordinal()):
+            return False
+        self.version += 1
+        return True
+
+    def is_completed(self, habit_name, day):
+        habit_bits = self.by_habit.get(habit_name)
+        return habit_bits is not None and as_date(day).toordinal() in habit_bits
+
+    def count_between(self, habit_name, start=None, end=None):
+        """Number of completions for a habit with start <= date <= end"""
+        habit_bits = self.by_habit.get(habit_name)
+        if habit_bits is None:
+            return 0
+        return habit_bits.count(None if start is None else as_date(start).toordinal(),
+                                None if end is None else as_date(end).toordinal())
+
+    def month_bits(self, habit_name, year, month, days_in_month):
+        """Bitmap of one month with bit (day - 1) set for each completed day"""
+        habit_bits = self.by_habit.get(habit_name)
+        if habit_bits is None:
+            return 0
+        first = date(year, month, 1).toordinal()
+        return habit_bits.slice(first, first + days_in_month - 1)
+
+    def year_bits(self, habit_name, year):
+        """Bitmap of one year with bit (day of year - 1) set for each completed day"""
+        habit_bits = self.by_habit.get(habit_name)
+        if habit_bits is None:
+            return 0
+        return habit_bits.slice(date(year, 1, 1).toordinal(), date(year, 12, 31).toordinal())
+
+    def ordinals(self, habit_name):
+        habit_bits = self.by_habit.get(habit_name)
+        return habit_bits.ordinals() if habit_bits is not None else []
+
+    def dates(self, habit_name):
+        """Completed dates of one habit, ascending"""
+        return [date.fromordinal(o) for o in self.ordinals(habit_name)]
+
+    def frozen(self):
+        """A copy that later marks do not touch; cheap because the bitsets
+        are immutable ints, so this is one small object per habit"""
+        store = CompletionStore()
+        store.by_habit = {name: habit_bits.copy() for name, habit_bits in self.by_habit.items()}
+        store.version = self.version
+        return store
+
+    def total(self):
+        return sum(len(habit_bits) for habit_bits in self.by_habit.values())
+
+    def habit_names(self):
+        """Habits with at least one completion, in first-seen order"""
+        return [name for name, habit_bits in self.by_habit.items() if habit_bits.bits]
@@ -1,19 +1,26 @@
 import customtkinter as ctk
 from tkinter import messagebox
-import csv
-import os
-from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-import seaborn as sns
+import argparse
+import calendar
+from datetime import datetime
+from app_controller import AppController
+from streaks import METRIC_HEADERS, metric_columns
+from perf import monitor
+from profiles import PROFILE_DIR, check_name
+from stats_panel import StatsPanel
+
+# Day columns kept in the grid; shorter months hide the tail
+MAX_DAYS = 31
+# Row frame, name, goal, day buttons, progress and metric labels
+ROW_WIDGETS = 4 + MAX_DAYS + len(METRIC_HEADERS)
 
 # Set appearance mode and color theme
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
-class HabitTrackerApp:
-    def __init__(self, root):
+class HabitTrackerApp(AppController):
+    def __init__(self, root, data_file="habits_data.csv", chart_debounce_ms=150,
+                 profile=None, profiles_dir=PROFILE_DIR, watch_ms=500):
         self.root = root
         self.root.title("Habit Tracker")
         self.root.geometry("1600x800")
@@ -34,39 +41,15 @@ class HabitTrackerApp:
         
         self.root.configure(fg_color=self.bg_dark)
         
-        # Set seaborn style
-        sns.set_style("darkgrid")
-        plt.style.use('dark_background')
-        
-        # CSV file
-        self.csv_file = "habits_data.csv"
-        self.init_csv()
-        
-        # Load data
-        self.habits = self.load_habits()
-        self.current_month = datetime.now().month
-        self.current_year = datetime.now().year
+        self.init_state(data_file, profile, profiles_dir, watch_ms)
+        self.grid_rows = []
+        self.grid_names = []
+        self.header_frame = None
+        self.view = None
         
         self.create_widgets()
-        self.refresh_data()
+        self.start_loading(data_file, profile, chart_debounce_ms)
         
-    def init_csv(self):
-        if not os.path.exists(self.csv_file):
-            with open(self.csv_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['habit', 'goal', 'date', 'completed'])
-                
-    def load_habits(self):
-        habits = []
-        if os.path.exists(self.csv_file):
-            with open(self.csv_file, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    habit_name = row['habit']
-                    if habit_name and not any(h['name'] == habit_name for h in habits):
-                        habits.append({'name': habit_name, 'goal': int(row['goal'])})
-        return habits
-    
     def create_widgets(self):
         # Main container
         main_frame = ctk.CTkFrame(self.root, fg_color=self.bg_dark)
@@ -110,12 +93,80 @@ class HabitTrackerApp:
                                corner_radius=8,height=40)
         add_btn.grid(row=1, column=1, padx=100, pady=5,sticky="w" )
         
+        # Streaming import/export
+        ctk.CTkButton(add_content, text="Import", command=self.import_history,
+                      fg_color=self.bg_light, hover_color="#4a4a4a", text_color=self.text,
+                      font=ctk.CTkFont(size=10), width=70, height=40,
+                      corner_radius=8).grid(row=1, column=2, padx=5, pady=5)
+        ctk.CTkButton(add_content, text="Export", command=self.export_history,
+                      fg_color=self.bg_light, hover_color="#4a4a4a", text_color=self.text,
+                      font=ctk.CTkFont(size=10), width=70, height=40,
+                      corner_radius=8).grid(row=1, column=3, padx=5, pady=5)
+        
         add_content.columnconfigure(1, weight=1)
         
+        # Month navigation
+        nav_frame = ctk.CTkFrame(left_frame, fg_color=self.bg_dark)
+        nav_frame.pack(fill="x", pady=(0, 10), padx=5)
+        
+        ctk.CTkButton(nav_frame, text="<", command=lambda: self.shift_month(-1),
+                      fg_color=self.bg_light, hover_color="#4a4a4a", text_color=self.text,
+                      font=ctk.CTkFont(size=12, weight="bold"), width=36, height=32,
+                      corner_radius=8).pack(side="left")
+        self.month_label = ctk.CTkLabel(nav_frame, font=ctk.CTkFont(size=14, weight="bold"),
+                                        text_color=self.text, width=170)
+        self.month_label.pack(side="left", padx=5)
+        ctk.CTkButton(nav_frame, text=">", command=lambda: self.shift_month(1),
+                      fg_color=self.bg_light, hover_color="#4a4a4a", text_color=self.text,
+                      font=ctk.CTkFont(size=12, weight="bold"), width=36, height=32,
+                      corner_radius=8).pack(side="left")
+        # Profile picker; typing a new name and pressing Enter creates it
+        self.profile_box = ctk.CTkComboBox(nav_frame, values=self.profiles.names(),
+                                           command=self.switch_profile,
+                                           fg_color=self.bg_light, button_color=self.bg_medium,
+                                           button_hover_color="#4a4a4a", text_color=self.text,
+                                           border_width=0, font=ctk.CTkFont(size=10),
+                                           width=130, height=32)
+        self.profile_box.set(self.profile or "")
+        self.profile_box.bind("<Return>", lambda event: self.switch_profile(self.profile_box.get()))
+        self.profile_box.pack(side="left", padx=(15, 0))
+        self.io_label = ctk.CTkLabel(nav_frame, text="", font=ctk.CTkFont(size=10),
+                                     text_color=self.text_dim)
+        self.io_label.pack(side="left", padx=10)
+        
+        # Year heatmap window (packed first, so it sits rightmost)
+        ctk.CTkButton(nav_frame, text="Year", command=self.year_panel.open,
+                      fg_color=self.bg_light, hover_color="#4a4a4a", text_color=self.text,
+                      font=ctk.CTkFont(size=10), width=60, height=32,
+                      corner_radius=8).pack(side="right", padx=(5, 0))
+        
+        # Jump to month
+        ctk.CTkButton(nav_frame, text="Today", command=self.show_today,
+                      fg_color=self.bg_light, hover_color="#4a4a4a", text_color=self.text,
+                      font=ctk.CTkFont(size=10), width=60, height=32,
+                      corner_radius=8).pack(side="right", padx=(5, 0))
+        ctk.CTkButton(nav_frame, text="Go", command=self.jump_to_month,
+                      fg_color=self.accent, hover_color=self.accent_hover, text_color="black",
+                      font=ctk.CTkFont(size=10, weight="bold"), width=50, height=32,
+                      corner_radius=8).pack(side="right", padx=(5, 0))
+        self.jump_year = ctk.CTkEntry(nav_frame, fg_color=self.bg_light, text_color=self.text,
+                                      border_width=0, font=ctk.CTkFont(size=10), width=70, height=32)
+        self.jump_year.pack(side="right", padx=(5, 0))
+        self.jump_month = ctk.CTkOptionMenu(nav_frame, values=list(calendar.month_name)[1:],
+                                            fg_color=self.bg_light, button_color=self.bg_medium,
+                                            button_hover_color="#4a4a4a", text_color=self.text,
+                                            font=ctk.CTkFont(size=10), width=120, height=32)
+        self.jump_month.pack(side="right")
+        
         # Habits scrollable frame
         self.scrollable_frame = ctk.CTkScrollableFrame(left_frame,width=700, fg_color=self.bg_dark)
         self.scrollable_frame.pack(fill="both", expand=True)
         
+        # Shared checkbox fonts, reused when cells are restyled
+        self.cell_font_filled = ctk.CTkFont(size=10, weight="bold")
+        self.cell_font_empty = ctk.CTkFont(size=8)
+        self.metric_font = ctk.CTkFont(size=8)
+        
         # Right panel - Statistics
         right_frame = ctk.CTkFrame(main_frame, fg_color=self.bg_dark, width=400)
         right_frame.pack(side="right", fill="both", padx=(10, 0))
@@ -126,12 +177,12 @@ class HabitTrackerApp:
                                    text_color=self.text)
         stats_title.pack(pady=(0, 15))
         
-        # Create matplotlib figure
-        self.fig = Figure(figsize=(4, 8), facecolor=self.bg_dark)
-        self.canvas_plot = FigureCanvasTkAgg(self.fig, master=right_frame)
-        self.canvas_plot.get_tk_widget().pack(fill="both", expand=True)
+        # Charts load after the first paint, see load_charts
+        self.stats_panel = StatsPanel(right_frame, self, flat=True)
         
     def add_habit(self):
+        if self.tracker is None:
+            return
         habit_name = self.habit_entry.get().strip()
         goal = self.goal_entry.get().strip()
         
@@ -145,69 +196,80 @@ class HabitTrackerApp:
             messagebox.showwarning("Input Error", "Goal must be a number")
             return
         
-        if any(h['name'] == habit_name for h in self.habits):
+        if self.tracker.add_habit(habit_name, goal) is None:
             messagebox.showwarning("Duplicate", "Habit already exists")
             return
         
-        self.habits.append({'name': habit_name, 'goal': goal})
         self.habit_entry.delete(0, 'end')
         self.goal_entry.delete(0, 'end')
         self.refresh_data()
         
     def mark_habit(self, habit_name, date, checkbox):
-        date_str = date.strftime("%Y-%m-%d")
-        
-        # Check if already marked
-        found = False
-        with open(self.csv_file, 'r') as f:
-            reader = csv.DictReader(f)
-            rows = list(reader)
-            for row in rows:
-                if row['habit'] == habit_name and row['date'] == date_str:
-                    found = True
-                    break
-        
-        if not found:
-            with open(self.csv_file, 'a', newline='') as f:
-                writer = csv.writer(f)
-                habit = next(h for h in self.habits if h['name'] == habit_name)
-                writer.writerow([habit_name, habit['goal'], date_str, 1])
-        
+        self.click_timer.click()
+        with monitor.phase('mark'):
+            self.record_mark(habit_name, date)
+    
+    def record_mark(self, habit_name, date):
+        # A click marks an open day and unmarks a completed one; the write
+        # itself is queued on the worker, so the cell updates before it lands
+        if self.tracker is not None:
+            self.tracker.toggle(habit_name, date)
+            # The cached view of that month is stale now
+            self.month_views.invalidate(date.year, date.month)
+            
+            # Restyle just the clicked cell and its row's progress
+            if self.grid_month == (date.year, date.month):
+                self.view = self.month_views.get(date.year, date.month)
+                self.style_cell(habit_name, date.day)
+                self.update_progress(self.tracker.habit(habit_name))
+            self.scheduler.mark_dirty('charts')
+    
+    def show_month(self, year, month):
+        self.current_year, self.current_month = year, month
+        self.month_label.configure(text=f"{calendar.month_name[month]} {year}")
+        self.jump_month.set(calendar.month_name[month])
+        self.jump_year.delete(0, 'end')
+        self.jump_year.insert(0, str(year))
         self.refresh_data()
     
-    def wrap_text(self, text, max_length=15):
-        """Wrap text if it exceeds max_length"""
-        if len(text) <= max_length:
-            return text
-        return text[:max_length-2] + ".."
-        
-    def refresh_data(self):
-        # Clear scrollable frame
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        
-        # Days in current month
-        first_day = datetime(self.current_year, self.current_month, 1)
-        if self.current_month == 12:
-            last_day = datetime(self.current_year + 1, 1, 1) - timedelta(days=1)
-        else:
-            last_day = datetime(self.current_year, self.current_month + 1, 1) - timedelta(days=1)
-        
-        days_in_month = last_day.day
-        
-        # Load completion data
-        completion_data = {}
-        with open(self.csv_file, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['habit'] and row['date']:
-                    key = (row['habit'], row['date'])
-                    completion_data[key] = True
+    def chosen_month(self):
+        return list(calendar.month_name).index(self.jump_month.get())
+    
+    def invalidate_grid(self):
+        # Re-apply the month so every cell is restyled
+        self.grid_month = None
+    
+    def update_grid(self):
+        with monitor.phase('grid'):
+            self.rebuild_grid()
+    
+    def rebuild_grid(self):
+        # Widgets are built once; months only restyle them from a cached view
+        if self.header_frame is None:
+            self.build_grid()
+        names = [habit.name for habit in self.habits]
+        if names[:len(self.grid_names)] != self.grid_names:
+            # Not just new habits at the end (another profile, or one archived)
+            self.clear_grid_rows()
+        for idx in range(len(self.grid_rows), len(self.habits)):
+            self.add_grid_row(idx, self.habits[idx])
+        if self.grid_month != (self.current_year, self.current_month):
+            self.apply_view(self.month_views.get(self.current_year, self.current_month))
+    
+    def build_grid(self):
+        # (habit, day) -> checkbox button, habit -> progress label
+        self.cells = {}
+        self.progress_labels = {}
+        self.metric_labels = {}
+        self.grid_rows = []
+        self.grid_names = []
+        self.day_headers = []
         
         # Create header with day numbers and weekday names
         header_frame = ctk.CTkFrame(self.scrollable_frame, fg_color=self.bg_medium, 
                                    corner_radius=8, border_width=1, border_color=self.bg_light)
         header_frame.pack(fill="x", pady=(0, 2))
+        self.header_frame = header_frame
         
         # Habit column header
         ctk.CTkLabel(header_frame, text="HABIT", font=ctk.CTkFont(size=9, weight="bold"), 
@@ -219,178 +281,154 @@ class HabitTrackerApp:
                     fg_color=self.bg_medium, text_color=self.text, 
                     width=50).grid(row=0, column=1, rowspan=2, sticky="nsew")
         
-        # Day headers - numbers and weekdays
-        weekdays = ['M', 'T', 'W', 'T', 'F', 'S', 'S']
-        for day in range(1, days_in_month + 1):
-            date = datetime(self.current_year, self.current_month, day)
-            weekday = weekdays[date.weekday()]
-            
+        # Day headers - numbers and weekdays, filled in by apply_view
+        for day in range(1, MAX_DAYS + 1):
             # Day number (top row)
-            ctk.CTkLabel(header_frame, text=str(day), font=ctk.CTkFont(size=8, weight="bold"), 
-                        fg_color=self.bg_medium, text_color=self.text, 
-                        width=25).grid(row=0, column=2 + day, padx=1, sticky="nsew")
+            day_label = ctk.CTkLabel(header_frame, text=str(day), font=ctk.CTkFont(size=8, weight="bold"), 
+                                     fg_color=self.bg_medium, text_color=self.text, width=25)
+            day_label.grid(row=0, column=2 + day, padx=1, sticky="nsew")
             
             # Weekday initial (bottom row)
-            ctk.CTkLabel(header_frame, text=weekday, font=ctk.CTkFont(size=7), 
-                        fg_color=self.bg_medium, text_color=self.text_dim, 
-                        width=25).grid(row=1, column=2 + day, padx=1, sticky="nsew")
+            wd_label = ctk.CTkLabel(header_frame, font=ctk.CTkFont(size=7), 
+                                    fg_color=self.bg_medium, text_color=self.text_dim, width=25)
+            wd_label.grid(row=1, column=2 + day, padx=1, sticky="nsew")
+            self.day_headers.append((day_label, wd_label))
         
         # Progress column header
         ctk.CTkLabel(header_frame, text="PROGRESS", font=ctk.CTkFont(size=9, weight="bold"), 
                     fg_color=self.bg_medium, text_color=self.text, 
-                    width=80).grid(row=0, column=3 + days_in_month, rowspan=2, sticky="nsew")
-        
-        # Create rows for each habit
-        for idx, habit in enumerate(self.habits):
-            row_bg = self.bg_light if idx % 2 == 0 else self.bg_medium
-            row_frame = ctk.CTkFrame(self.scrollable_frame, fg_color=row_bg, 
-                                    corner_radius=8, border_width=1, border_color=self.bg_light)
-            row_frame.pack(fill="x", pady=1)
-            
-            # Habit name with wrapping
-            wrapped_name = self.wrap_text(habit['name'], 18)
-            habit_label = ctk.CTkLabel(row_frame, text=wrapped_name, font=ctk.CTkFont(size=9), 
-                                       fg_color=row_bg, text_color=self.text, 
-                                       width=150, anchor="w")
-            habit_label.grid(row=0, column=0, sticky="nsew", pady=4, padx=5)
-            
-            # Goal
-            ctk.CTkLabel(row_frame, text=str(habit['goal']), font=ctk.CTkFont(size=9), 
-                        fg_color=row_bg, text_color=self.text, 
-                        width=50).grid(row=0, column=1, sticky="nsew", pady=4)
-            
-            # Day checkboxes
-            completed = 0
-            for day in range(1, days_in_month + 1):
-                date = datetime(self.current_year, self.current_month, day)
-                date_str = date.strftime("%Y-%m-%d")
-                is_completed = (habit['name'], date_str) in completion_data
-                
-                if is_completed:
-                    completed += 1
-                
-                # Create checkbox button
-                if is_completed:
-                    # Filled box with checkmark
-                    btn = ctk.CTkButton(row_frame, text="✓", font=ctk.CTkFont(size=10, weight="bold"),
-                                       fg_color=self.checkbox_filled, text_color="black",
-                                       hover_color=self.accent_hover,
-                                       width=25, height=25, corner_radius=5,
-                                       command=lambda h=habit['name'], d=date, cb=None: self.mark_habit(h, d, cb))
+                    width=80).grid(row=0, column=3 + MAX_DAYS, rowspan=2, sticky="nsew")
+        
+        # Streak and rolling-rate column headers
+        for i, title in enumerate(METRIC_HEADERS):
+            ctk.CTkLabel(header_frame, text=title, font=ctk.CTkFont(size=8, weight="bold"), 
+                        fg_color=self.bg_medium, text_color=self.text, 
+                        width=45).grid(row=0, column=4 + MAX_DAYS + i, rowspan=2, sticky="nsew")
+        monitor.count('widgets_created', 4 + 2 * MAX_DAYS + len(METRIC_HEADERS))
+    
+    def apply_view(self, view):
+        """Point the existing widgets at another month"""
+        month_changed = self.grid_month != (view.year, view.month)
+        self.view = view
+        self.grid_month = (view.year, view.month)
+        if not month_changed:
+            return
+        
+        # Header labels and the day columns this month doesn't have
+        for day, (day_label, wd_label) in enumerate(self.day_headers, start=1):
+            if day <= view.days_in_month:
+                wd_label.configure(text=view.day_headers[day - 1][1])
+                day_label.grid()
+                wd_label.grid()
+            else:
+                day_label.grid_remove()
+                wd_label.grid_remove()
+        
+        for habit in self.habits[:len(self.grid_rows)]:
+            for day in range(1, MAX_DAYS + 1):
+                if day <= view.days_in_month:
+                    self.cells[(habit.name, day)].grid()
+                    self.style_cell(habit.name, day)
                 else:
-                    # Empty box
-                    btn = ctk.CTkButton(row_frame, text="", font=ctk.CTkFont(size=8),
-                                       fg_color=self.checkbox_empty, text_color=self.text,
-                                       hover_color="#4a4a4a",
-                                       width=25, height=25, corner_radius=5,
-                                       command=lambda h=habit['name'], d=date, cb=None: self.mark_habit(h, d, cb))
-                
-                btn.grid(row=0, column=2 + day, padx=2, pady=4)
-            
-            # Progress
-            progress = int((completed / habit['goal']) * 100) if habit['goal'] > 0 else 0
-            progress_color = self.danger if progress < 30 else self.warning if progress < 70 else self.success
-            
-            progress_label = ctk.CTkLabel(row_frame, text=f"{progress}%", 
-                                         font=ctk.CTkFont(size=9, weight="bold"), 
-                                         fg_color=row_bg, text_color=progress_color, width=80)
-            progress_label.grid(row=0, column=3 + days_in_month, sticky="nsew", pady=4)
-        
-        self.update_graphs()
-        
-    def update_graphs(self):
-        self.fig.clear()
-        
-        # Calculate statistics
-        monthly_progress = {}
-        last_3_days = {}
-        momentum = {}
-        
-        with open(self.csv_file, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['habit'] and row['date']:
-                    habit = row['habit']
-                    date = datetime.strptime(row['date'], "%Y-%m-%d")
-                    
-                    if date.month == self.current_month and date.year == self.current_year:
-                        monthly_progress[habit] = monthly_progress.get(habit, 0) + 1
-                    
-                    days_ago = (datetime.now() - date).days
-                    if days_ago <= 3:
-                        last_3_days[habit] = last_3_days.get(habit, 0) + 1
-                    
-                    if days_ago <= 3:
-                        momentum[habit] = momentum.get(habit, 0) + 1
-        
-        # Create three subplots
-        gs = self.fig.add_gridspec(3, 1, hspace=0.4, top=0.95, bottom=0.05)
-        
-        # Monthly Progress
-        ax1 = self.fig.add_subplot(gs[0])
-        if self.habits and monthly_progress:
-            habits_list = [h['name'] for h in self.habits]
-            progress_pct = []
-            for h in self.habits:
-                completed = monthly_progress.get(h['name'], 0)
-                pct = (completed / h['goal']) * 100 if h['goal'] > 0 else 0
-                progress_pct.append(pct)
-            
-            colors = [self.danger if p < 30 else self.warning if p < 70 else self.success for p in progress_pct]
-            bars = ax1.barh(habits_list, progress_pct, color=colors,edgecolor="none")
-            ax1.set_xlabel('Progress (%)', color=self.text, fontsize=9)
-            ax1.set_title('MONTHLY PROGRESS', color=self.text, fontsize=11, fontweight='bold', pad=10)
-            ax1.set_xlim(0, 100)
-            ax1.tick_params(colors=self.text, labelsize=8)
-            ax1.set_facecolor(self.bg_medium)
-            ax1.spines['bottom'].set_color(self.text_dim)
-            ax1.spines['left'].set_color(self.text_dim)
-            ax1.spines['top'].set_visible(False)
-            ax1.spines['right'].set_visible(False)
-            ax1.grid(False)
-        
-        # Last 3 Days
-        ax2 = self.fig.add_subplot(gs[1])
-        if self.habits and last_3_days:
-            habits_list = [h['name'] for h in self.habits]
-            days_data = [last_3_days.get(h['name'], 0) for h in self.habits]
-            
-            bars = ax2.barh(habits_list, days_data, color=self.accent,edgecolor="none")
-            ax2.set_xlabel('Days Completed', color=self.text, fontsize=9)
-            ax2.set_title('LAST 3 DAYS', color=self.text, fontsize=11, fontweight='bold', pad=10)
-            ax2.tick_params(colors=self.text, labelsize=8)
-            ax2.set_facecolor(self.bg_medium)
-            ax2.spines['bottom'].set_color(self.text_dim)
-            ax2.spines['left'].set_color(self.text_dim)
-            ax2.spines['top'].set_visible(False)
-            ax2.spines['right'].set_visible(False)
-            ax2.grid(False)
-        
-        # Momentum (pie chart)
-        ax3 = self.fig.add_subplot(gs[2])
-        if momentum:
-            labels = list(momentum.keys())
-            sizes = list(momentum.values())
-            colors_pie = ['#6366F1', '#8B5CF6', '#22D3EE', '#F43F5E', '#FBBF24'][:len(labels)]
-            
-            wedges, texts, autotexts = ax3.pie(sizes, labels=labels, autopct='%1.0f%%',
-                                                colors=colors_pie, startangle=90,wedgeprops={'linewidth': 0, 'edgecolor': 'none'})
-            for text in texts:
-                text.set_color(self.text)
-                text.set_fontsize(8)
-            for autotext in autotexts:
-                autotext.set_color('snow')
-                autotext.set_fontsize(10)
-                autotext.set_fontweight('bold')
-            
-            ax3.set_title('MOMENTUM', color=self.text, fontsize=11, fontweight='bold', pad=10)
-            ax3.set_facecolor(self.bg_medium)
+                    self.cells[(habit.name, day)].grid_remove()
+            self.update_progress(habit)
+    
+    def clear_grid_rows(self):
+        for row_frame in self.grid_rows:
+            row_frame.destroy()
+        monitor.count('widgets_destroyed', ROW_WIDGETS * len(self.grid_rows))
+        self.grid_rows = []
+        self.grid_names = []
+        self.cells.clear()
+        self.progress_labels.clear()
+        self.metric_labels.clear()
+        # New rows style themselves from the view that apply_view installs
+        self.grid_month = None
+    
+    def add_grid_row(self, idx, habit):
+        row_bg = self.bg_light if idx % 2 == 0 else self.bg_medium
+        row_frame = ctk.CTkFrame(self.scrollable_frame, fg_color=row_bg, 
+                                corner_radius=8, border_width=1, border_color=self.bg_light)
+        row_frame.pack(fill="x", pady=1)
+        self.grid_rows.append(row_frame)
+        self.grid_names.append(habit.name)
+        
+        # Habit name with wrapping
+        wrapped_name = self.wrap_text(habit.name, 18)
+        habit_label = ctk.CTkLabel(row_frame, text=wrapped_name, font=ctk.CTkFont(size=9), 
+                                   fg_color=row_bg, text_color=self.text, 
+                                   width=150, anchor="w")
+        habit_label.grid(row=0, column=0, sticky="nsew", pady=4, padx=5)
+        
+        # Goal
+        ctk.CTkLabel(row_frame, text=str(habit.goal), font=ctk.CTkFont(size=9), 
+                    fg_color=row_bg, text_color=self.text, 
+                    width=50).grid(row=0, column=1, sticky="nsew", pady=4)
+        
+        # Day checkboxes; the date is resolved against the month on screen at click time
+        for day in range(1, MAX_DAYS + 1):
+            btn = ctk.CTkButton(row_frame, width=25, height=25, corner_radius=5,
+                               command=lambda h=habit.name, d=day, cb=None: self.mark_habit(
+                                   h, datetime(self.current_year, self.current_month, d), cb))
+            btn.grid(row=0, column=2 + day, padx=2, pady=4)
+            self.cells[(habit.name, day)] = btn
+            if self.view is not None and day > self.view.days_in_month:
+                btn.grid_remove()
+            elif self.view is not None:
+                self.style_cell(habit.name, day)
+        
+        # Progress
+        progress_label = ctk.CTkLabel(row_frame, font=ctk.CTkFont(size=9, weight="bold"), 
+                                     fg_color=row_bg, width=80)
+        progress_label.grid(row=0, column=3 + MAX_DAYS, sticky="nsew", pady=4)
+        self.progress_labels[habit.name] = progress_label
+        
+        # Streak and rolling rates
+        metric_labels = []
+        for i in range(len(METRIC_HEADERS)):
+            label = ctk.CTkLabel(row_frame, font=self.metric_font, fg_color=row_bg,
+                                 text_color=self.text_dim, width=45)
+            label.grid(row=0, column=4 + MAX_DAYS + i, sticky="nsew", pady=4)
+            metric_labels.append(label)
+        self.metric_labels[habit.name] = metric_labels
+        monitor.count('widgets_created', ROW_WIDGETS)
+        if self.view is not None:
+            self.update_progress(habit)
+    
+    def style_cell(self, habit_name, day):
+        btn = self.cells[(habit_name, day)]
+        if self.view.is_completed(habit_name, day):
+            # Filled box with checkmark
+            btn.configure(text="✓", font=self.cell_font_filled,
+                          fg_color=self.checkbox_filled, text_color="black",
+                          hover_color=self.accent_hover)
+        else:
+            # Empty box
+            btn.configure(text="", font=self.cell_font_empty,
+                          fg_color=self.checkbox_empty, text_color=self.text,
+                          hover_color="#4a4a4a")
+    
+    def update_progress(self, habit):
+        completed = self.view.counts.get(habit.name, 0)
+        
+        progress = int((completed / habit.goal) * 100) if habit.goal > 0 else 0
+        progress_color = self.progress_color(progress)
+        self.progress_labels[habit.name].configure(text=f"{progress}%", text_color=progress_color)
+        
+        texts = metric_columns(self.streaks.metrics(habit.name))
+        for label, text in zip(self.metric_labels[habit.name], texts):
+            label.configure(text=text)
         
-        self.fig.patch.set_facecolor(self.bg_dark)
-        self.canvas_plot.draw()
-
 if __name__ == "__main__":
     ctk.set_appearance_mode("dark")
+    parser = argparse.ArgumentParser(description="Habit tracker")
+    parser.add_argument("data_file", nargs="?", default="habits_data.csv")
+    parser.add_argument("--profile", type=check_name,
+                        help="open a named profile instead of data_file")
+    parser.add_argument("--profiles-dir", default=PROFILE_DIR)
+    args = parser.parse_args()
     root = ctk.CTk()
-    app = HabitTrackerApp(root)
+    monitor.configure_from_env()
+    app = HabitTrackerApp(root, args.data_file, profile=args.profile,
+                          profiles_dir=args.profiles_dir)
     root.mainloop()
\ No newline at end of file
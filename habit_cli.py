@@ -0,0 +1,152 @@
+"""Headless habit reports: no tkinter, no matplotlib.
+
+    python habit_cli.py month [--month YYYY-MM] [--format table|json|csv]
+    python habit_cli.py recent [--days N] [--format table|json|csv]
+    python habit_cli.py import FILE [--chunk-size N]
+    python habit_cli.py export FILE [--chunk-size N]
+    python habit_cli.py habits [--format table|json|csv]
+    python habit_cli.py archive|unarchive HABIT
+    python habit_cli.py --profile NAME month
+    python habit_cli.py profiles
+    python habit_cli.py aggregate [--month YYYY-MM] [--processes N]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import date
+
+from habit_core import HabitTracker
+from habit_io import CHUNK_SIZE, export_history, import_history
+from profiles import AGGREGATE_COLUMNS, PROFILE_DIR, aggregate, list_profiles, profile_path
+
+MONTH_COLUMNS = ['habit', 'goal', 'done', 'progress', 'current_streak', 'longest_streak']
+RECENT_COLUMNS = ['habit', 'done', 'rate']
+HABIT_COLUMNS = ['habit', 'goal', 'created', 'archived']
+
+
+def print_table(rows, columns, out):
+    widths = [max([len(c)] + [len(str(r[c])) for r in rows]) for c in columns]
+    out.write("  ".join(c.upper().ljust(w) for c, w in zip(columns, widths)).rstrip() + "\n")
+    for row in rows:
+        cells = []
+        for c, w in zip(columns, widths):
+            value = str(row[c])
+            cells.append(value.ljust(w) if c == 'habit' else value.rjust(w))
+        out.write("  ".join(cells).rstrip() + "\n")
+
+
+def emit(rows, columns, fmt, out=sys.stdout):
+    if fmt == 'json':
+        json.dump(rows, out, indent=2)
+        out.write("\n")
+    elif fmt == 'csv':
+        writer = csv.DictWriter(out, fieldnames=columns, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        print_table(rows, columns, out)
+
+
+def parse_month(value):
+    try:
+        year, month = (int(part) for part in value.split("-"))
+        date(year, month, 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected YYYY-MM")
+    return year, month
+
+
+def print_progress(progress, out=sys.stderr):
+    out.write(f"\r{progress.fraction:6.1%}  {progress.rows} rows")
+    out.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Habit progress reports")
+    parser.add_argument("--data", default="habits_data.csv",
+                        help="habits file (.csv, or .db for SQLite)")
+    parser.add_argument("--profile", help="use this profile's shard instead of --data")
+    parser.add_argument("--profiles-dir", default=PROFILE_DIR, help="directory of profile shards")
+    parser.add_argument("--format", choices=["table", "json", "csv"], default="table")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    month_cmd = commands.add_parser("month", help="progress for one month")
+    month_cmd.add_argument("--month", type=parse_month, help="YYYY-MM (default: this month)")
+
+    recent_cmd = commands.add_parser("recent", help="completions over the last N days")
+    recent_cmd.add_argument("--days", type=int, default=3)
+
+    for name, help_text in (("import", "merge a .csv or .jsonl export into the data file"),
+                            ("export", "write the full history to a .csv or .jsonl file")):
+        io_cmd = commands.add_parser(name, help=help_text)
+        io_cmd.add_argument("file")
+        io_cmd.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    commands.add_parser("habits", help="every habit definition, archived ones included")
+    for name, help_text in (("archive", "hide a habit from reports, keeping its history"),
+                            ("unarchive", "bring an archived habit back")):
+        commands.add_parser(name, help=help_text).add_argument("habit")
+
+    commands.add_parser("profiles", help="list the profiles in --profiles-dir")
+    aggregate_cmd = commands.add_parser("aggregate", help="month progress merged across profiles")
+    aggregate_cmd.add_argument("--month", type=parse_month, help="YYYY-MM (default: this month)")
+    aggregate_cmd.add_argument("--processes", type=int, help="worker processes (default: one per CPU)")
+
+    args = parser.parse_args(argv)
+    if args.command == "profiles":
+        print("\n".join(list_profiles(args.profiles_dir)))
+        return
+    if args.command == "aggregate":
+        today = date.today()
+        year, month = args.month or (today.year, today.month)
+        _, rows = aggregate(args.profiles_dir, year, month, args.processes)
+        emit(rows, AGGREGATE_COLUMNS, args.format)
+        return
+    if args.profile:
+        try:
+            args.data = profile_path(args.profiles_dir, args.profile)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.command == "import":
+            os.makedirs(args.profiles_dir, exist_ok=True)
+    if args.command != "import" and not os.path.exists(args.data):
+        parser.error(f"{args.data} does not exist")
+    if args.command == "import" and not os.path.exists(args.file):
+        parser.error(f"{args.file} does not exist")
+
+    tracker = HabitTracker(args.data)
+    try:
+        if args.command == "import":
+            result = import_history(tracker, args.file, chunk_size=args.chunk_size,
+                                    progress=print_progress)
+            sys.stderr.write("\n")
+            if result is not None:
+                print(f"{result.added} new marks from {result.rows} rows "
+                      f"({result.skipped} skipped)")
+        elif args.command == "export":
+            result = export_history(tracker, args.file, chunk_size=args.chunk_size,
+                                    progress=print_progress)
+            sys.stderr.write("\n")
+            print(f"{result.rows} rows written to {args.file}")
+        elif args.command == "habits":
+            emit([{'habit': h.name, 'goal': h.goal,
+                   'created': h.created.isoformat() if h.created else '',
+                   'archived': int(h.archived)} for h in tracker.registry.habits],
+                 HABIT_COLUMNS, args.format)
+        elif args.command in ("archive", "unarchive"):
+            if tracker.archive_habit(args.habit, args.command == "archive") is None:
+                parser.error(f"no habit named {args.habit!r}")
+        elif args.command == "month":
+            today = date.today()
+            year, month = args.month or (today.year, today.month)
+            emit(tracker.month_report(year, month), MONTH_COLUMNS, args.format)
+        else:
+            emit(tracker.recent_report(args.days), RECENT_COLUMNS, args.format)
+    finally:
+        tracker.close()
+
+
+if __name__ == "__main__":
+    main()
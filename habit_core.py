@@ -0,0 +1,223 @@
+import calendar
+from datetime import date, timedelta
+
+from completion_store import CompletionStore, as_date
+from habit_registry import HabitRegistry
+from perf import monitor
+from storage import open_storage
+from streaks import StreakTracker
+
+
+class HabitTracker:
+    """GUI-free habit model: storage plus the in-memory indexes built from it.
+
+    Nothing here imports tkinter, matplotlib or NumPy, so reports built on
+    the completion index and streak tracker start quickly.
+
+    Writes go through ``persist(fn, *args)``, which calls ``fn`` right away
+    by default. The GUI swaps in a background worker so the in-memory
+    indexes update at once while the write is still in flight.
+    """
+
+    def __init__(self, data_file="habits_data.csv", persist=None):
+        self.data_file = data_file
+        self.persist = persist or (lambda fn, *args: fn(*args))
+        with monitor.phase('load'):
+            self.storage = open_storage(data_file)
+            self.registry = HabitRegistry(self.storage.load_habits())
+            # Active habits; archived ones keep their history but drop out of views
+            self.habits = self.registry.active
+            self.completions = CompletionStore()
+            self.storage.load_index(self.completions)
+            self.streaks = StreakTracker.from_store(self.completions)
+
+    @property
+    def version(self):
+        """Changes whenever a habit or a completion does"""
+        return self.registry.version, self.completions.version
+
+    def start(self):
+        self.storage.start()
+
+    def close(self):
+        # Take in other processes' last writes so the saved index is complete
+        self.sync()
+        self.storage.close()
+        self.storage.save_index(self.registry.habits, self.completions)
+
+    # Changes from other processes
+
+    def sync(self):
+        """Fold in what other processes wrote to the same data file"""
+        return self.apply_changes(self.storage.changes())
+
+    def apply_changes(self, changes):
+        """Apply a ``storage.changes()`` result without writing anything back;
+        returns True if anything changed. The GUI fetches the changes on its
+        worker and applies them on the Tk thread."""
+        if changes is None:
+            return False
+        habits, marks = changes
+        if habits is not None:
+            self.registry.update(habits)
+        if marks is None:
+            # The GUI does this half on its worker, see AppController.changes_loaded
+            self.reload()
+            return True
+        for habit_name, date_str, completed in marks:
+            if completed:
+                self._add(habit_name, date_str)
+            else:
+                self._remove(habit_name, date_str)
+        return True
+
+    def reload(self):
+        """Rebuild the indexes from storage, in place so views keep their references"""
+        self.swap_index(self.load_index())
+
+    def load_index(self):
+        """Fresh (completions, streaks) read from storage, for ``swap_index``.
+        This tracker's own indexes are not touched, so the GUI runs it on its
+        worker while they stay in use."""
+        with monitor.phase('load'):
+            # Marks still buffered would be missing from the files
+            self.storage.flush()
+            completions = CompletionStore()
+            self.storage.load_index(completions)
+            return completions, StreakTracker.from_store(completions)
+
+    def swap_index(self, index):
+        """Put a ``load_index`` result in place of the current indexes"""
+        completions, streaks = index
+        self.completions.replace(completions)
+        self.streaks.replace(streaks)
+
+    # Updates
+
+    def habit(self, habit_name):
+        return self.registry.get(habit_name)
+
+    def add_habit(self, habit_name, goal):
+        """Add and persist a habit; returns None if the name is taken"""
+        habit = self.registry.add(habit_name, goal)
+        if habit is not None:
+            self.persist(self.storage.save_habit, *habit.fields())
+        return habit
+
+    def archive_habit(self, habit_name, archived=True):
+        """Hide a habit from the views (or bring it back); returns None if unknown"""
+        habit = self.registry.set_archived(habit_name, archived)
+        if habit is not None:
+            self.persist(self.storage.save_habit, *habit.fields())
+        return habit
+
+    def _add(self, habit_name, day):
+        """Update the in-memory indexes only; False if already completed"""
+        if not self.completions.add(habit_name, day):
+            return False
+        self.streaks.add(habit_name, day)
+        return True
+
+    def _remove(self, habit_name, day):
+        if not self.completions.remove(habit_name, day):
+            return False
+        self.streaks.remove(habit_name, day)
+        return True
+
+    def mark(self, habit_name, day):
+        """Record a completion everywhere; returns False if it already existed"""
+        if not self._add(habit_name, day):
+            return False
+        habit = self.habit(habit_name)
+        self.persist(self.storage.add_mark, habit_name, habit.goal, as_date(day).isoformat())
+        return True
+
+    def unmark(self, habit_name, day):
+        """Remove a completion everywhere; returns False if it was not recorded"""
+        if not self._remove(habit_name, day):
+            return False
+        habit = self.habit(habit_name)
+        self.persist(self.storage.remove_mark, habit_name, habit.goal, as_date(day).isoformat())
+        return True
+
+    def toggle(self, habit_name, day):
+        """Mark an open day or unmark a completed one; returns the new state"""
+        if self.unmark(habit_name, day):
+            return False
+        return self.mark(habit_name, day)
+
+    def merge(self, rows):
+        """Merge (habit, goal, day) rows from an import; a day of None is a
+        habit definition. Known (habit, day) pairs are skipped and the new
+        marks are persisted as one batch. Returns the number of new marks."""
+        added = []
+        for habit_name, goal, day in rows:
+            habit = self.registry.get(habit_name) or self.add_habit(habit_name, goal)
+            if day is None or not self._add(habit_name, day):
+                continue
+            added.append((habit_name, habit.goal, day.isoformat()))
+        if added:
+            self.persist(self.storage.add_marks, added)
+        return len(added)
+
+    # Reports
+
+    def month_report(self, year, month):
+        """One row per habit: month count, progress against goal and streaks"""
+        first = date(year, month, 1)
+        last = date(year, month, calendar.monthrange(year, month)[1])
+        rows = []
+        for h in self.habits:
+            done = self.completions.count_between(h.name, first, last)
+            rows.append({
+                'habit': h.name,
+                'goal': h.goal,
+                'done': done,
+                'progress': int(done / h.goal * 100) if h.goal > 0 else 0,
+                'current_streak': self.streaks.current_streak(h.name),
+                'longest_streak': self.streaks.longest_streak(h.name),
+            })
+        return rows
+
+    def recent_report(self, days, today=None):
+        """One row per habit: completions from ``days`` days ago onwards,
+        counted the same way as the LAST 3 DAYS chart"""
+        today = as_date(today or date.today())
+        start = today - timedelta(days=days)
+        return [{'habit': h.name,
+                 'done': self.completions.count_between(h.name, start),
+                 'rate': round(self.completions.count_between(h.name, start, today) / (days + 1), 3)}
+                for h in self.habits]
+
+    def streak_table(self):
+        """habit -> (current, longest) for the streak chart"""
+        return {h.name: (self.streaks.current_streak(h.name),
+                         self.streaks.longest_streak(h.name)) for h in self.habits}
+
+    def chart_data(self, year, month):
+        """Inputs for StatsPanel.draw"""
+        monthly_progress, last_3_days = chart_counts(self.completions, self.habits, year, month)
+        # Momentum is the same 3-day window as the LAST 3 DAYS chart
+        return monthly_progress, last_3_days, last_3_days, self.streak_table()
+
+
+def chart_counts(store, habits, year, month, today=None):
+    """Non-zero month and last-3-days counts per habit.
+
+    Only reads ``store``, so the GUI can hand a ``CompletionStore.frozen()``
+    copy to its worker thread and compute these off the Tk thread.
+    """
+    today = as_date(today or date.today())
+    first = date(year, month, 1)
+    last = date(year, month, calendar.monthrange(year, month)[1])
+    monthly_progress = {}
+    last_3_days = {}
+    with monitor.phase('chart_counts'):
+        for h in habits:
+            done = store.count_between(h.name, first, last)
+            if done:
+                monthly_progress[h.name] = done
+            recent = store.count_between(h.name, today - timedelta(days=3))
+            if recent:
+                last_3_days[h.name] = recent
+    return monthly_progress, last_3_days
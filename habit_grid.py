@@ -0,0 +1,285 @@
+import tkinter as tk
+from datetime import datetime
+
+from perf import monitor
+from streaks import METRIC_HEADERS, metric_columns
+
+# Layout in pixels
+HEADER_H = 40
+ROW_H = 30
+NAME_W = 140
+GOAL_W = 45
+CELL_W = 26
+CELL_SIZE = 18
+PROGRESS_W = 80
+METRIC_W = 46
+
+
+def _item_count(items):
+    """Canvas items owned by one pooled row"""
+    return 4 + len(items['cells']) + len(items['marks']) + len(items['metrics'])
+
+
+class HabitGrid:
+    """Month grid drawn as items on one canvas.
+
+    Only rows inside the viewport own canvas items. Rows that scroll out hand
+    their items back to a pool and rows that scroll in reuse them, so the
+    cost of a repaint depends on the window height, not on the habit count.
+    Clicks are mapped back to (habit, date) from the pointer coordinates.
+    """
+
+    def __init__(self, master, app, on_click):
+        self.app = app
+        self.on_click = on_click
+        self.habits = []
+        self.names = []
+        self.row_of = {}
+        self.view = None
+        self.days_in_month = 0
+
+        self.canvas = tk.Canvas(master, bg=app.bg_dark, highlightthickness=0,
+                                yscrollincrement=ROW_H)
+        self.scrollbar = tk.Scrollbar(master, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.header_items = []
+        # row index -> item ids of a drawn row, plus recycled rows
+        self.visible = {}
+        self.pool = []
+        self._row_count = 0
+        self.tooltip = None
+
+        self.canvas.bind("<Configure>", lambda e: self.render())
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Motion>", self._on_motion)
+        self.canvas.bind("<Leave>", lambda e: self._hide_tooltip())
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
+
+    # Model
+
+    def set_view(self, view, refill=False):
+        """Show a MonthView; visible rows are refilled, not recreated. Within
+        the same month rows are only refilled with ``refill``, for changes
+        that did not come from a click on this grid."""
+        month_changed = self.view is None or (view.year, view.month) != (self.view.year, self.view.month)
+        self.view = view
+        if not month_changed:
+            if refill:
+                for idx, items in self.visible.items():
+                    self._fill_row(idx, items)
+            return
+        if view.days_in_month != self.days_in_month:
+            # Row item layouts depend on the day count, so start from scratch
+            for items in list(self.visible.values()) + self.pool:
+                self._delete_row(items)
+            self.visible.clear()
+            self.pool.clear()
+            self.days_in_month = view.days_in_month
+        self._draw_header()
+        for idx, items in self.visible.items():
+            self._fill_row(idx, items)
+        self.render()
+
+    def set_habits(self, habits):
+        names = [h.name for h in habits]
+        # Rows on screen are refilled only for another list (a profile switch)
+        # or a reordered one (a habit archived); new habits just render
+        stale = habits is not self.habits or names[:len(self.names)] != self.names
+        self.habits = habits
+        self.names = names
+        self.row_of = {name: idx for idx, name in enumerate(names)}
+        self._update_scrollregion()
+        self.render()
+        if stale:
+            for idx, items in self.visible.items():
+                self._fill_row(idx, items)
+
+    def refresh_habit(self, habit_name):
+        """Restyle one habit's row if it is currently on screen"""
+        idx = self.row_of.get(habit_name)
+        if idx in self.visible:
+            self._fill_row(idx, self.visible[idx])
+
+    # Drawing
+
+    @property
+    def width(self):
+        return self.metrics_x + METRIC_W * len(METRIC_HEADERS)
+
+    @property
+    def metrics_x(self):
+        """Left edge of the streak/rate columns, right of PROGRESS"""
+        return NAME_W + GOAL_W + CELL_W * self.days_in_month + PROGRESS_W
+
+    def _update_scrollregion(self):
+        height = HEADER_H + ROW_H * len(self.habits)
+        self.canvas.configure(scrollregion=(0, 0, self.width, height))
+
+    def _draw_header(self):
+        app = self.app
+        c = self.canvas
+        for item in self.header_items:
+            c.delete(item)
+        monitor.count('canvas_items_deleted', len(self.header_items))
+        items = [c.create_rectangle(0, 0, self.width, HEADER_H - 2, fill=app.bg_medium,
+                                    outline=app.bg_light)]
+        items.append(c.create_text(5, HEADER_H / 2, text="HABIT", anchor="w",
+                                   font=("Arial", 9, "bold"), fill=app.text))
+        items.append(c.create_text(NAME_W + GOAL_W / 2, HEADER_H / 2, text="GOAL",
+                                   font=("Arial", 9, "bold"), fill=app.text))
+        for day, weekday in self.view.day_headers:
+            x = NAME_W + GOAL_W + CELL_W * (day - 1) + CELL_W / 2
+            items.append(c.create_text(x, 12, text=str(day), font=("Arial", 8, "bold"),
+                                       fill=app.text))
+            items.append(c.create_text(x, 28, text=weekday, font=("Arial", 7),
+                                       fill=app.text_dim))
+        items.append(c.create_text(self.metrics_x - PROGRESS_W / 2, HEADER_H / 2, text="PROGRESS",
+                                   font=("Arial", 9, "bold"), fill=app.text))
+        for i, title in enumerate(METRIC_HEADERS):
+            items.append(c.create_text(self.metrics_x + METRIC_W * (i + 0.5), HEADER_H / 2,
+                                       text=title, font=("Arial", 8, "bold"), fill=app.text))
+        self.header_items = items
+        monitor.count('canvas_items_created', len(items))
+        self._update_scrollregion()
+
+    def render(self):
+        """Bind canvas items to exactly the rows inside the viewport"""
+        if not self.days_in_month:
+            return
+        c = self.canvas
+        top = c.canvasy(0)
+        bottom = top + c.winfo_height()
+        first = max(int((top - HEADER_H) // ROW_H), 0)
+        last = min(int((bottom - HEADER_H) // ROW_H) + 1, len(self.habits))
+        wanted = range(first, last)
+
+        for idx in [i for i in self.visible if i not in wanted]:
+            items = self.visible.pop(idx)
+            c.itemconfigure(items['tag'], state="hidden")
+            self.pool.append(items)
+
+        for idx in wanted:
+            if idx not in self.visible:
+                items = self.pool.pop() if self.pool else self._create_row()
+                self._move_row(items, idx)
+                self._fill_row(idx, items)
+                c.itemconfigure(items['tag'], state="normal")
+                self.visible[idx] = items
+
+    def _create_row(self):
+        app = self.app
+        c = self.canvas
+        self._row_count += 1
+        tag = f"row{self._row_count}"
+        items = {'tag': tag, 'cells': [], 'marks': []}
+        items['bg'] = c.create_rectangle(0, 0, 0, 0, outline=app.bg_dark, tags=tag)
+        items['name'] = c.create_text(0, 0, anchor="w", font=("Arial", 9), fill=app.text, tags=tag)
+        items['goal'] = c.create_text(0, 0, font=("Arial", 9), fill=app.text, tags=tag)
+        for _ in range(self.days_in_month):
+            items['cells'].append(c.create_rectangle(0, 0, 0, 0, tags=tag))
+            items['marks'].append(c.create_text(0, 0, font=("Arial", 8, "bold"), fill="white",
+                                                tags=tag))
+        items['progress'] = c.create_text(0, 0, font=("Arial", 9, "bold"), tags=tag)
+        items['metrics'] = [c.create_text(0, 0, font=("Arial", 8), fill=app.text_dim, tags=tag)
+                            for _ in METRIC_HEADERS]
+        monitor.count('canvas_items_created', _item_count(items))
+        return items
+
+    def _move_row(self, items, idx):
+        c = self.canvas
+        y0 = HEADER_H + ROW_H * idx
+        mid = y0 + ROW_H / 2
+        c.coords(items['bg'], 0, y0, self.width, y0 + ROW_H - 1)
+        c.coords(items['name'], 5, mid)
+        c.coords(items['goal'], NAME_W + GOAL_W / 2, mid)
+        half = CELL_SIZE / 2
+        for day, (cell, mark) in enumerate(zip(items['cells'], items['marks'])):
+            x = NAME_W + GOAL_W + CELL_W * day + CELL_W / 2
+            c.coords(cell, x - half, mid - half, x + half, mid + half)
+            c.coords(mark, x, mid)
+        c.coords(items['progress'], self.metrics_x - PROGRESS_W / 2, mid)
+        for i, item in enumerate(items['metrics']):
+            c.coords(item, self.metrics_x + METRIC_W * (i + 0.5), mid)
+
+    def _fill_row(self, idx, items):
+        app = self.app
+        c = self.canvas
+        habit = self.habits[idx]
+        c.itemconfigure(items['bg'], fill=app.bg_light if idx % 2 == 0 else app.bg_medium)
+        c.itemconfigure(items['name'], text=app.wrap_text(habit.name, 18))
+        c.itemconfigure(items['goal'], text=str(habit.goal))
+        for day, (cell, mark) in enumerate(zip(items['cells'], items['marks']), start=1):
+            if self.view.is_completed(habit.name, day):
+                # Filled box with X mark
+                c.itemconfigure(cell, fill=app.success, outline=app.success)
+                c.itemconfigure(mark, text="X")
+            else:
+                # Empty box
+                c.itemconfigure(cell, fill=app.bg_dark, outline=app.text_dim)
+                c.itemconfigure(mark, text="")
+        progress, color = app.habit_progress(habit)
+        c.itemconfigure(items['progress'], text=f"{progress}%", fill=color)
+        for item, text in zip(items['metrics'], metric_columns(app.streaks.metrics(habit.name))):
+            c.itemconfigure(item, text=text)
+
+    def _delete_row(self, items):
+        self.canvas.delete(items['tag'])
+        monitor.count('canvas_items_deleted', _item_count(items))
+
+    # Events
+
+    def _hit(self, event):
+        """Map pointer coordinates to (row index, day) or None"""
+        x = self.canvas.canvasx(event.x)
+        y = self.canvas.canvasy(event.y)
+        if y < HEADER_H:
+            return None
+        idx = int((y - HEADER_H) // ROW_H)
+        if idx >= len(self.habits):
+            return None
+        day = int((x - NAME_W - GOAL_W) // CELL_W) + 1 if x >= NAME_W + GOAL_W else 0
+        return idx, day
+
+    def _on_click(self, event):
+        hit = self._hit(event)
+        if hit and 1 <= hit[1] <= self.days_in_month:
+            idx, day = hit
+            self.on_click(self.habits[idx].name, datetime(self.view.year, self.view.month, day))
+
+    def _on_motion(self, event):
+        # Tooltip with the full name when the name column is truncated
+        hit = self._hit(event)
+        x = self.canvas.canvasx(event.x)
+        if hit and x < NAME_W and len(self.habits[hit[0]].name) > 18:
+            name = self.habits[hit[0]].name
+            if self.tooltip is None or self.tooltip.text != name:
+                self._hide_tooltip()
+                self.tooltip = tk.Toplevel()
+                self.tooltip.text = name
+                self.tooltip.wm_overrideredirect(True)
+                self.tooltip.wm_geometry(f"+{event.x_root+10}+{event.y_root+10}")
+                tk.Label(self.tooltip, text=name, background=self.app.bg_light,
+                         foreground=self.app.text, relief=tk.SOLID, borderwidth=1,
+                         font=("Arial", 9), padx=5, pady=3).pack()
+                monitor.count('widgets_created', 2)
+        else:
+            self._hide_tooltip()
+
+    def _hide_tooltip(self):
+        if self.tooltip is not None:
+            self.tooltip.destroy()
+            self.tooltip = None
+            # The Toplevel and its label; grid rows are canvas items, not widgets
+            monitor.count('widgets_destroyed', 2)
+
+    def _on_wheel(self, event):
+        self.canvas.yview_scroll(-1 if event.delta > 0 else 1, "units")
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.render()
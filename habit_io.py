@@ -0,0 +1,195 @@
+"""Streaming import/export of habit histories.
+
+Files are read and written a chunk of rows at a time, so memory use does not
+depend on the size of the file. Both directions are generators that yield a
+Progress after every chunk. The GUI parses import chunks on its worker
+thread and merges them on the Tk thread, and steps exports from
+``root.after``; ``import_history`` / ``export_history`` simply run them to
+the end with an optional progress callback.
+
+Two formats are understood, picked from the file extension:
+
+    .csv            habit,goal,date,completed (the habits_data.csv layout)
+    .jsonl/.ndjson  one {"habit", "goal", "date", "completed"} object per line
+"""
+import csv
+import json
+import os
+
+from completion_store import as_date
+from habit_log import FIELDNAMES
+from perf import monitor
+
+CHUNK_SIZE = 10000
+JSONL_EXTENSIONS = ('.jsonl', '.ndjson')
+
+
+class Progress:
+    """Running totals for one import or export"""
+
+    __slots__ = ('rows', 'added', 'skipped', 'done', 'total')
+
+    def __init__(self, total):
+        self.rows = 0
+        self.added = 0
+        self.skipped = 0
+        # Bytes read (import) or rows written (export), out of total
+        self.done = 0
+        self.total = total
+
+    @property
+    def fraction(self):
+        return min(self.done / self.total, 1.0) if self.total else 1.0
+
+
+def detect_format(path):
+    return 'jsonl' if os.path.splitext(path)[1].lower() in JSONL_EXTENSIONS else 'csv'
+
+
+def _is_cancelled(completed):
+    return str(completed).strip().lower() in ('0', 'false')
+
+
+def _parse(record):
+    """(habit, goal, day) from one input record; day is None for a definition"""
+    habit_name = str(record.get('habit') or '').strip()
+    if not habit_name:
+        raise ValueError("missing habit name")
+    goal = int(record.get('goal') or 0)
+    day = record.get('date')
+    return habit_name, goal, as_date(day) if day else None
+
+
+def _read_csv(path):
+    """Yield (record, bytes read so far) for each CSV row"""
+    with open(path, 'r', newline='') as f:
+        for record in csv.DictReader(f):
+            # The text layer reads ahead, so this is accurate to one buffer
+            yield record, f.buffer.tell()
+
+
+def _read_jsonl(path):
+    done = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            done += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield record if isinstance(record, dict) else {}, done
+
+
+def read_chunks(path, fmt=None, chunk_size=CHUNK_SIZE):
+    """Yield (rows, skipped, bytes_read) per chunk of ``chunk_size`` records.
+
+    Rows are (habit, goal, day) tuples; malformed records and cancelled marks
+    (completed = 0) are counted in ``skipped`` instead.
+    """
+    reader = _read_jsonl if (fmt or detect_format(path)) == 'jsonl' else _read_csv
+    rows, skipped, done = [], 0, 0
+    for record, done in reader(path):
+        if _is_cancelled(record.get('completed', '')):
+            skipped += 1
+        else:
+            try:
+                rows.append(_parse(record))
+            except (TypeError, ValueError):
+                skipped += 1
+        if len(rows) + skipped >= chunk_size:
+            monitor.count('rows_parsed', len(rows) + skipped)
+            yield rows, skipped, done
+            rows, skipped = [], 0
+    if rows or skipped:
+        monitor.count('rows_parsed', len(rows) + skipped)
+        yield rows, skipped, done
+
+
+def open_import(path, fmt=None, chunk_size=CHUNK_SIZE):
+    """(chunk generator, Progress) for an import; see read_chunks"""
+    return read_chunks(path, fmt, chunk_size), Progress(os.path.getsize(path))
+
+
+def merge_chunk(tracker, progress, chunk):
+    """Merge one read_chunks item into a HabitTracker and update ``progress``"""
+    rows, skipped, done = chunk
+    progress.rows += len(rows) + skipped
+    progress.skipped += skipped
+    progress.added += tracker.merge(rows)
+    progress.done = done
+
+
+def iter_import(tracker, path, fmt=None, chunk_size=CHUNK_SIZE):
+    """Merge a CSV or JSON-lines export into a HabitTracker, one chunk at a time"""
+    chunks, progress = open_import(path, fmt, chunk_size)
+    for chunk in chunks:
+        merge_chunk(tracker, progress, chunk)
+        yield progress
+
+
+def _iter_records(tracker):
+    """Definitions first, then every completion grouped by habit, in date order.
+    Archived habits are included so their history survives a round trip."""
+    habits = list(tracker.registry.habits)
+    for habit in habits:
+        yield {'habit': habit.name, 'goal': habit.goal, 'date': '', 'completed': ''}
+    for habit in habits:
+        # A fresh list per habit, so marks made while exporting cannot shift the loop
+        for day in tracker.completions.dates(habit.name):
+            yield {'habit': habit.name, 'goal': habit.goal,
+                   'date': day.isoformat(), 'completed': 1}
+
+
+def iter_export(tracker, path, fmt=None, chunk_size=CHUNK_SIZE):
+    """Write the tracker's history to a CSV or JSON-lines file, one chunk at a time.
+
+    The file is written next to ``path`` and moved into place at the end, so
+    an interrupted export never leaves half a file behind.
+    """
+    jsonl = (fmt or detect_format(path)) == 'jsonl'
+    progress = Progress(len(tracker.registry) + tracker.completions.total())
+    tmp_file = path + ".tmp"
+    with open(tmp_file, 'w', newline='') as f:
+        writer = None
+        if not jsonl:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            writer.writeheader()
+        chunk = []
+        for record in _iter_records(tracker):
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                _write_chunk(f, writer, chunk, progress)
+                chunk = []
+                yield progress
+        _write_chunk(f, writer, chunk, progress)
+    os.replace(tmp_file, path)
+    yield progress
+
+
+def _write_chunk(f, writer, chunk, progress):
+    if writer is None:
+        f.write("".join(json.dumps(record) + "\n" for record in chunk))
+    else:
+        writer.writerows(chunk)
+    progress.rows += len(chunk)
+    progress.done += len(chunk)
+
+
+def run(steps, progress=None):
+    """Drive an import/export generator to the end; returns the final Progress"""
+    last = None
+    for last in steps:
+        if progress is not None:
+            progress(last)
+    return last
+
+
+def import_history(tracker, path, fmt=None, chunk_size=CHUNK_SIZE, progress=None):
+    return run(iter_import(tracker, path, fmt, chunk_size), progress)
+
+
+def export_history(tracker, path, fmt=None, chunk_size=CHUNK_SIZE, progress=None):
+    return run(iter_export(tracker, path, fmt, chunk_size), progress)
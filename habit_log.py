@@ -0,0 +1,430 @@
+import csv
+import io
+import os
+import threading
+
+from file_lock import FileLock
+from perf import monitor
+
+FIELDNAMES = ['habit', 'goal', 'date', 'completed']
+# ``completed`` value of a row that cancels an earlier mark of the same day
+TOMBSTONE = '0'
+
+
+class _Unsorted(Exception):
+    """The snapshot is not in the order compaction writes"""
+
+
+def _fsync_dir(path):
+    """Make a rename durable by syncing its directory (POSIX only)"""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class HabitLog:
+    """Append-only persistence for the habits CSV.
+
+    The CSV itself is a compacted, sorted snapshot. New rows are buffered in
+    memory, written to a side log (``<csv>.wal``) in batches with one fsync
+    per batch, and folded back into the snapshot by a background thread.
+    A batch goes out every ``flush_interval`` seconds; the default is short
+    enough that another app instance sees a click well within a second.
+    A batch that cannot be written stays buffered and is retried; the
+    background thread keeps running and leaves the error for ``take_error``.
+
+    Unmarking a day appends a tombstone row (``completed`` = 0). The latest
+    row for a (habit, date) pair decides whether it is completed, and
+    compaction drops cancelled pairs, so tombstones only ever live in the
+    side log.
+
+    Several processes may share the files. Writes and compaction hold a lock
+    file (``<csv>.lock``), and each log remembers how far into the side log
+    it has read. Rows that other processes append are picked up from that
+    offset by ``poll``. Compaction moves the side log aside to ``<csv>.wal.1``
+    rather than deleting it, so the others can still finish reading it.
+    """
+
+    def __init__(self, csv_file, flush_interval=0.25, compact_threshold=500):
+        self.csv_file = csv_file
+        self.wal_file = csv_file + ".wal"
+        self.flush_interval = flush_interval
+        self.compact_threshold = compact_threshold
+
+        self.pending = []
+        self.wal_rows = 0
+        # Guards the pending buffer; held only for list operations
+        self.lock = threading.Lock()
+        # Serialises every write to the snapshot and the side log
+        self.io_lock = threading.Lock()
+        # The same, across processes
+        self.file_lock = FileLock(csv_file + ".lock")
+
+        # Bytes of the side log already applied, and which file that was
+        # (device, inode), so a compaction elsewhere is noticed
+        self.offset = 0
+        self.wal_id = None
+        # The snapshot as last seen; it only changes when someone compacts
+        self.snapshot_id = None
+        # Rows other processes appended, read but not yet handed out by poll
+        self.incoming = []
+        # Set when a side log went by unread; the caller has to reload
+        self.lost = False
+
+        # A background flush or compaction that failed, until taken by
+        # take_error; set once per run of failures. The rows stay pending.
+        self.error = None
+        self.failing = False
+
+        self._stop = threading.Event()
+        self._thread = None
+
+        if not os.path.exists(self.csv_file):
+            self._write_snapshot([])
+
+    def start(self):
+        """Start the background flush/compaction thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def read_rows(self):
+        """Yield every row of the snapshot followed by the side log"""
+        parsed = 0
+        with open(self.csv_file, 'r', newline='') as f:
+            for row in csv.DictReader(f):
+                parsed += 1
+                yield row
+        if os.path.exists(self.wal_file):
+            count = 0
+            with open(self.wal_file, 'r', newline='') as f:
+                for row in csv.DictReader(f, fieldnames=FIELDNAMES):
+                    count += 1
+                    yield row
+            self.wal_rows = count
+            parsed += count
+        monitor.count('rows_parsed', parsed)
+
+    def iter_marks(self):
+        """Yield (habit, date) for every completed day, tombstones applied.
+
+        The side log is read first, keeping the latest state per pair, and
+        the snapshot is streamed past it; with no side log this is a plain
+        scan of the snapshot.
+        """
+        latest = {}
+        parsed = 0
+        if os.path.exists(self.wal_file):
+            with open(self.wal_file, 'r', newline='') as f:
+                for row in csv.DictReader(f, fieldnames=FIELDNAMES):
+                    parsed += 1
+                    if row['habit'] and row['date']:
+                        latest[(row['habit'], row['date'])] = row['completed'] != TOMBSTONE
+            self.wal_rows = parsed
+        with open(self.csv_file, 'r', newline='') as f:
+            for row in csv.DictReader(f):
+                parsed += 1
+                habit, day = row['habit'], row['date']
+                if not habit or not day or row['completed'] == TOMBSTONE:
+                    continue
+                if latest and (habit, day) in latest:
+                    continue
+                yield habit, day
+        for (habit, day), completed in latest.items():
+            if completed:
+                yield habit, day
+        monitor.count('rows_parsed', parsed)
+
+    # Changes made by other processes
+
+    def _wal_stat(self, path=None):
+        try:
+            st = os.stat(path or self.wal_file)
+        except FileNotFoundError:
+            return None, 0
+        return (st.st_dev, st.st_ino), st.st_size
+
+    def _snapshot_stat(self):
+        # Size and mtime too, since a later snapshot may reuse the inode
+        try:
+            st = os.stat(self.csv_file)
+        except FileNotFoundError:
+            return None
+        return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+    def _unchanged(self):
+        return (self._wal_stat() == (self.wal_id, self.offset) and
+                self._snapshot_stat() == self.snapshot_id)
+
+    def mark_synced(self):
+        """Record that everything in the files right now has been loaded;
+        call with ``file_lock`` held so nothing is appended in between"""
+        self.wal_id, self.offset = self._wal_stat()
+        self.snapshot_id = self._snapshot_stat()
+        with self.lock:
+            self.incoming = []
+            self.lost = False
+
+    def caught_up(self):
+        """True if nothing has been written since the last sync or poll"""
+        return not self.incoming and not self.lost and self._unchanged()
+
+    def _read_from(self, path, offset):
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        rows = list(csv.reader(io.StringIO(data.decode('utf-8'), newline='')))
+        self.wal_rows += len(rows)
+        with self.lock:
+            self.incoming.extend(rows)
+        return offset + len(data)
+
+    def _sync_wal(self):
+        """Read rows other processes appended; ``io_lock`` and ``file_lock`` held"""
+        wal_id, size = self._wal_stat()
+        snapshot_id = self._snapshot_stat()
+        if snapshot_id != self.snapshot_id or (
+                self.wal_id is not None and (wal_id != self.wal_id or size < self.offset)):
+            # Compacted elsewhere: finish the side log we were reading first.
+            # If that is not the one rotated out, or there was none, a side
+            # log may have come and gone unseen.
+            old_id, _ = self._wal_stat(self.wal_file + ".1")
+            if self.wal_id is not None and old_id == self.wal_id:
+                self._read_from(self.wal_file + ".1", self.offset)
+            else:
+                with self.lock:
+                    self.lost = True
+            self.wal_id, self.offset = None, 0
+            self.snapshot_id = snapshot_id
+        if wal_id is not None:
+            self.wal_id = wal_id
+            if size > self.offset:
+                self.offset = self._read_from(self.wal_file, self.offset)
+
+    def poll(self):
+        """Rows other processes appended since the last poll, and whether
+        some were missed so the caller has to reload. A stat when nothing
+        changed."""
+        if not self.incoming and not self.lost and self._unchanged():
+            return [], False
+        with self.io_lock, self.file_lock:
+            self._sync_wal()
+        with self.lock:
+            rows, self.incoming = self.incoming, []
+            lost, self.lost = self.lost, False
+        return rows, lost
+
+    # Writes
+
+    def append(self, habit, goal, date_str='', completed=''):
+        """Buffer one row; it reaches disk on the next flush"""
+        with self.lock:
+            self.pending.append([habit, goal, date_str, completed])
+
+    def extend(self, rows):
+        """Buffer many [habit, goal, date, completed] rows at once"""
+        with self.lock:
+            self.pending.extend(rows)
+
+    def flush(self):
+        """Write all buffered rows to the side log with a single fsync"""
+        with self.lock:
+            rows, self.pending = self.pending, []
+        if not rows:
+            return
+        try:
+            with self.io_lock, self.file_lock:
+                # Take in other processes' rows first so the offset stays exact
+                self._sync_wal()
+                with open(self.wal_file, 'a', newline='') as f:
+                    start = f.tell()
+                    try:
+                        csv.writer(f).writerows(rows)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    except BaseException:
+                        # No half-written row for the next batch to run into
+                        f.truncate(start)
+                        raise
+                    end = f.tell()
+                self.wal_id, _ = self._wal_stat()
+                self.offset = end
+                self.wal_rows += len(rows)
+        except BaseException:
+            # Kept for the next flush, ahead of rows buffered since
+            with self.lock:
+                self.pending[:0] = rows
+            raise
+
+    def compact(self):
+        """Fold the side log into a deduplicated, sorted snapshot, dropping
+        tombstones along with the marks they cancel"""
+        with self.io_lock, self.file_lock:
+            self._sync_wal()
+            try:
+                self._write_snapshot(self._merged_rows())
+            except _Unsorted:
+                # Written by an older version; sorted once, streamed from then on
+                self._write_snapshot(self._sorted_rows())
+
+            # Only retire the side log once the snapshot is safely in place;
+            # other processes may still be reading it
+            if os.path.exists(self.wal_file):
+                os.replace(self.wal_file, self.wal_file + ".1")
+            self.wal_id, self.offset = None, 0
+            self.snapshot_id = self._snapshot_stat()
+            self.wal_rows = 0
+
+    def _merged_rows(self):
+        """Stream the snapshot merged with the side log's latest states.
+
+        A compacted snapshot is grouped by habit, definition first and dates
+        ascending, so only the side log's (habit, date) pairs are held in
+        memory. Raises _Unsorted for a snapshot in any other order.
+        """
+        # habit -> first definition row / {date: row, or None if unmarked},
+        # in the order habits first appear in the side log
+        wal_definitions = {}
+        wal_marks = {}
+        parsed = 0
+        if os.path.exists(self.wal_file):
+            with open(self.wal_file, 'r', newline='') as f:
+                for row in csv.DictReader(f, fieldnames=FIELDNAMES):
+                    parsed += 1
+                    habit = row['habit']
+                    if not habit:
+                        continue
+                    marks = wal_marks.setdefault(habit, {})
+                    if row['date']:
+                        # Later rows win, so a tombstone cancels the mark before it
+                        marks[row['date']] = None if row['completed'] == TOMBSTONE else row
+                    else:
+                        wal_definitions.setdefault(habit, row)
+
+        seen = set()
+        current = None
+        pending, i = [], 0
+        with open(self.csv_file, 'r', newline='') as f:
+            for row in csv.DictReader(f):
+                parsed += 1
+                habit, day = row['habit'], row['date']
+                if not habit:
+                    continue
+                if habit != current:
+                    if current is not None:
+                        yield from (r for _, r in pending[i:] if r is not None)
+                    if habit in seen:
+                        raise _Unsorted
+                    seen.add(habit)
+                    current, last = habit, None
+                    pending = sorted(wal_marks.pop(habit, {}).items())
+                    i = 0
+                    definition = wal_definitions.pop(habit, None)
+                    if day:
+                        if definition is not None:
+                            yield definition
+                    else:
+                        yield row
+                        continue
+                if not day:
+                    if last is not None:
+                        raise _Unsorted
+                    # A repeated definition
+                    continue
+                if row['completed'] == TOMBSTONE or (last is not None and day < last):
+                    raise _Unsorted
+                if day == last:
+                    continue
+                last = day
+                while i < len(pending) and pending[i][0] < day:
+                    if pending[i][1] is not None:
+                        yield pending[i][1]
+                    i += 1
+                if i < len(pending) and pending[i][0] == day:
+                    # The side log has the final say on this day
+                    if pending[i][1] is not None:
+                        yield row
+                    i += 1
+                else:
+                    yield row
+            if current is not None:
+                yield from (r for _, r in pending[i:] if r is not None)
+
+        # Habits the snapshot does not have yet
+        for habit, marks in wal_marks.items():
+            definition = wal_definitions.get(habit)
+            if definition is not None:
+                yield definition
+            yield from (r for _, r in sorted(marks.items()) if r is not None)
+        monitor.count('rows_parsed', parsed)
+
+    def _sorted_rows(self):
+        """Every row in compacted order, sorted in memory"""
+        habit_order = {}
+        definitions = {}
+        marks = {}
+        for row in self.read_rows():
+            habit = row['habit']
+            if not habit:
+                continue
+            habit_order.setdefault(habit, len(habit_order))
+            if row['date']:
+                # Later rows win, so a tombstone cancels the mark before it
+                key = (habit, row['date'])
+                if row['completed'] == TOMBSTONE:
+                    marks.pop(key, None)
+                elif key not in marks:
+                    marks[key] = row
+            else:
+                definitions.setdefault(habit, row)
+
+        rows = list(definitions.values()) + list(marks.values())
+        rows.sort(key=lambda r: (habit_order[r['habit']], r['date']))
+        return rows
+
+    def close(self):
+        """Stop the background thread and flush anything still buffered"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _write_snapshot(self, rows):
+        tmp_file = self.csv_file + ".tmp"
+        with open(tmp_file, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.csv_file)
+        _fsync_dir(self.csv_file)
+
+    def take_error(self):
+        """The error of a failed background write since the last call, or None"""
+        with self.lock:
+            error, self.error = self.error, None
+        return error
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                if self.wal_rows >= self.compact_threshold:
+                    self.compact()
+            except Exception as e:
+                # Retried on the next turn; reported once until a write succeeds
+                with self.lock:
+                    if not self.failing:
+                        self.error = e
+                    self.failing = True
+            else:
+                self.failing = False
@@ -0,0 +1,89 @@
+from datetime import date
+
+
+class Habit:
+    """One habit definition"""
+
+    __slots__ = ('name', 'goal', 'created', 'archived')
+
+    def __init__(self, name, goal, created=None, archived=False):
+        self.name = name
+        self.goal = goal
+        # Date the habit was defined (None if unknown, e.g. rebuilt from marks)
+        self.created = created
+        self.archived = archived
+
+    def __repr__(self):
+        return f"Habit({self.name!r}, {self.goal!r})"
+
+    def fields(self):
+        """(name, goal, created ISO string or '', archived) for storage"""
+        created = self.created.isoformat() if self.created else ''
+        return self.name, self.goal, created, self.archived
+
+
+class HabitRegistry:
+    """Habit definitions indexed by name.
+
+    ``habits`` holds every definition in creation order and ``active`` the
+    ones not archived. ``active`` is updated in place, so views that keep a
+    reference to it (the GUI grid, reports) see additions and archiving.
+    """
+
+    def __init__(self, habits=()):
+        self.habits = []
+        self.active = []
+        self.by_name = {}
+        # Bumped on every change to a definition
+        self.version = 0
+        for habit in habits:
+            self._insert(habit)
+
+    def __contains__(self, habit_name):
+        return habit_name in self.by_name
+
+    def __len__(self):
+        return len(self.habits)
+
+    def get(self, habit_name):
+        return self.by_name.get(habit_name)
+
+    def _insert(self, habit):
+        self.habits.append(habit)
+        self.by_name[habit.name] = habit
+        if not habit.archived:
+            self.active.append(habit)
+
+    def add(self, habit_name, goal, created=None):
+        """Define a new habit; returns None if the name is taken"""
+        if habit_name in self.by_name:
+            return None
+        habit = Habit(habit_name, goal, created or date.today())
+        self._insert(habit)
+        self.version += 1
+        return habit
+
+    def set_archived(self, habit_name, archived=True):
+        """Archive or restore a habit; returns it, or None if unknown"""
+        habit = self.by_name.get(habit_name)
+        if habit is None or habit.archived == archived:
+            return habit
+        habit.archived = archived
+        # Rebuilt in definition order so a restored habit returns to its row
+        self.active[:] = [h for h in self.habits if not h.archived]
+        self.version += 1
+        return habit
+
+    def update(self, habits):
+        """Take in definitions saved by another process"""
+        for habit in habits:
+            known = self.by_name.get(habit.name)
+            if known is None:
+                self.habits.append(habit)
+                self.by_name[habit.name] = habit
+            else:
+                known.goal = habit.goal
+                known.created = habit.created
+                known.archived = habit.archived
+        self.active[:] = [h for h in self.habits if not h.archived]
+        self.version += 1
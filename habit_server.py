@@ -0,0 +1,344 @@
+"""Local HTTP/JSON API for scripts and phone shortcuts.
+
+    python habit_server.py [--data habits_data.csv | --profile NAME]
+                           [--host 127.0.0.1] [--port 8765] [--token SECRET]
+
+    GET    /habits                              every habit definition
+    POST   /habits/<name>/marks/<YYYY-MM-DD>    mark a day
+    DELETE /habits/<name>/marks/<YYYY-MM-DD>    unmark it
+    GET    /stats/month[?month=YYYY-MM]         the month report (habit_cli.py month)
+    GET    /stats/recent[?days=N]               completions over the last N days
+    GET    /stats/charts[?month=YYYY-MM]        what the statistics panel plots
+
+Marks go through the same HabitTracker as a click in the window, and the
+stats come from the same reports and ``chart_counts``. Writes reach storage
+on a background thread, and changes made by an open app window are picked
+up every half second.
+
+GET responses carry an ETag built from the data version, a token picked
+when the server starts (the version counters start over on every launch)
+and today's date.
+A request whose If-None-Match still matches gets a 304 without the body
+being built. Otherwise the body is rendered once per URL and served from
+a small cache until the data changes.
+
+The server listens on 127.0.0.1 only; pass ``--host 0.0.0.0`` to reach it
+from the LAN, preferably together with ``--token`` (sent as
+``Authorization: Bearer SECRET``). Only the standard library is used.
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import signal
+import sys
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from completion_store import as_date
+from habit_core import HabitTracker, chart_counts
+from profiles import PROFILE_DIR, profile_path
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 401: "Unauthorized",
+           404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+MAX_BODY = 64 * 1024
+CACHE_SIZE = 256
+
+
+class HttpError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or REASONS[status])
+        self.status = status
+
+
+def _parse_month(query):
+    value = query.get('month')
+    if value is None:
+        today = date.today()
+        return today.year, today.month
+    try:
+        year, month = (int(part) for part in value.split("-"))
+        date(year, month, 1)
+    except ValueError:
+        raise HttpError(400, "month must be YYYY-MM")
+    return year, month
+
+
+def _parse_int(query, name, default, lo=1, hi=3660):
+    try:
+        value = int(query.get(name, default))
+    except ValueError:
+        raise HttpError(400, f"{name} must be a number")
+    if not lo <= value <= hi:
+        raise HttpError(400, f"{name} must be between {lo} and {hi}")
+    return value
+
+
+class HabitServer:
+    """Serves one HabitTracker over HTTP/1.1 with keep-alive.
+
+    The tracker is only touched from the event loop. Storage writes and the
+    poll for other processes' changes run on one background thread, in
+    order, like the GUI's worker.
+    """
+
+    def __init__(self, tracker, token=None, sync_interval=0.5):
+        self.tracker = tracker
+        self.token = token
+        self.sync_interval = sync_interval
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="habit-server-io")
+        tracker.persist = self._persist
+        # Tells ETags from an earlier run apart, whose counters may match ours
+        self.boot = os.urandom(4).hex()
+        # URL -> (etag, body), least recently used first
+        self.cache = OrderedDict()
+        self.server = None
+        self._sync_task = None
+
+    def _persist(self, fn, *args):
+        self.executor.submit(fn, *args).add_done_callback(self._write_done)
+
+    @staticmethod
+    def _write_done(future):
+        if future.exception() is not None:
+            error = future.exception()
+            traceback.print_exception(type(error), error, error.__traceback__)
+
+    # Lifecycle
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """Start listening; returns the bound (host, port)"""
+        self.server = await asyncio.start_server(self._client, host, port)
+        self._sync_task = asyncio.create_task(self._sync_loop())
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            self._sync_task = None
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        # Let queued writes land
+        await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+
+    async def _sync_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            error = self.tracker.storage.take_write_error()
+            if error is not None:
+                # The rows stay buffered and are retried
+                sys.stderr.write(f"write failed, will retry: {error}\n")
+            try:
+                changes = await loop.run_in_executor(self.executor, self.tracker.storage.changes)
+                self.tracker.apply_changes(changes)
+            except OSError:
+                # Usually a file caught mid-replace; the next poll tries again
+                continue
+            except Exception:
+                # Keep polling; a bad record must not stop the server seeing changes
+                traceback.print_exc()
+
+    # Connections
+
+    async def _client(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                status, payload, extra = self.respond(method, target, headers, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self._write_response(writer, status, payload, extra, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HttpError as e:
+            self._write_response(writer, e.status, self._error_body(e), {}, False)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, _ = line.decode('latin-1').split()
+        except ValueError:
+            raise HttpError(400, "malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HttpError(400, "bad Content-Length")
+        if length > MAX_BODY:
+            raise HttpError(413)
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    @staticmethod
+    def _write_response(writer, status, payload, extra, keep_alive):
+        head = [f"HTTP/1.1 {status} {REASONS[status]}",
+                f"Content-Length: {len(payload)}",
+                "Connection: " + ("keep-alive" if keep_alive else "close")]
+        if payload:
+            head.append("Content-Type: application/json")
+        head += [f"{name}: {value}" for name, value in extra.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + payload)
+
+    @staticmethod
+    def _error_body(error):
+        return json.dumps({'error': str(error)}).encode('utf-8')
+
+    # Requests
+
+    def respond(self, method, target, headers, body=b""):
+        """(status, body bytes, extra headers) for one request"""
+        try:
+            url = urlsplit(target)
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            self._check_token(headers, query)
+            parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+            if method == 'GET':
+                return self._get(url, parts, query, headers)
+            if len(parts) == 4 and parts[0] == 'habits' and parts[2] == 'marks':
+                if method not in ('POST', 'DELETE'):
+                    raise HttpError(405)
+                return 200, self._set_mark(parts[1], parts[3], method == 'POST'), {}
+            raise HttpError(404 if method in ('POST', 'DELETE') else 405)
+        except HttpError as e:
+            return e.status, self._error_body(e), {}
+        except Exception as e:
+            traceback.print_exc()
+            return 500, self._error_body(e), {}
+
+    def _check_token(self, headers, query):
+        if self.token is None:
+            return
+        supplied = query.get('token', '')
+        auth = headers.get('authorization', '')
+        if auth.startswith("Bearer "):
+            supplied = auth[len("Bearer "):]
+        if not hmac.compare_digest(supplied.encode(), self.token.encode()):
+            raise HttpError(401)
+
+    def _get(self, url, parts, query, headers):
+        route = self.ROUTES.get(tuple(parts))
+        if route is None:
+            raise HttpError(404)
+        # Everything served depends only on the data and on today's date
+        registry_version, store_version = self.tracker.version
+        etag = f'"{self.boot}.{registry_version}.{store_version}.{date.today().toordinal()}"'
+        if etag in (tag.strip() for tag in headers.get('if-none-match', '').split(",")):
+            return 304, b"", {'ETag': etag}
+        key = url.path + "?" + url.query
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == etag:
+            self.cache.move_to_end(key)
+            return 200, cached[1], {'ETag': etag}
+        payload = json.dumps(route(self, query)).encode('utf-8')
+        self.cache[key] = (etag, payload)
+        self.cache.move_to_end(key)
+        if len(self.cache) > CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return 200, payload, {'ETag': etag}
+
+    def _set_mark(self, habit_name, day, completed):
+        if self.tracker.habit(habit_name) is None:
+            raise HttpError(404, f"no habit named {habit_name!r}")
+        try:
+            day = as_date(day)
+        except ValueError:
+            raise HttpError(400, "date must be YYYY-MM-DD")
+        if completed:
+            changed = self.tracker.mark(habit_name, day)
+        else:
+            changed = self.tracker.unmark(habit_name, day)
+        return json.dumps({'habit': habit_name, 'date': day.isoformat(),
+                           'completed': completed, 'changed': changed}).encode('utf-8')
+
+    # GET routes
+
+    def _habits(self, query):
+        return [{'habit': h.name, 'goal': h.goal,
+                 'created': h.created.isoformat() if h.created else None,
+                 'archived': h.archived} for h in self.tracker.registry.habits]
+
+    def _month(self, query):
+        return self.tracker.month_report(*_parse_month(query))
+
+    def _recent(self, query):
+        return self.tracker.recent_report(_parse_int(query, 'days', 3))
+
+    def _charts(self, query):
+        year, month = _parse_month(query)
+        monthly_progress, last_3_days = chart_counts(
+            self.tracker.completions, self.tracker.habits, year, month)
+        return {'monthly_progress': monthly_progress, 'last_3_days': last_3_days,
+                'streaks': self.tracker.streak_table()}
+
+    ROUTES = {('habits',): _habits, ('stats', 'month'): _month,
+              ('stats', 'recent'): _recent, ('stats', 'charts'): _charts}
+
+
+async def serve(tracker, host, port, token=None):
+    server = HabitServer(tracker, token)
+    bound_host, bound_port = await server.start(host, port)
+    print(f"serving on http://{bound_host}:{bound_port}", flush=True)
+    stop = asyncio.Event()
+    try:
+        # Shut down cleanly when a service manager stops us
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    except (NotImplementedError, AttributeError):
+        pass  # Windows; Ctrl+C still works
+    try:
+        await stop.wait()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON API for habit data")
+    parser.add_argument("--data", default="habits_data.csv",
+                        help="habits file (.csv, or .db for SQLite)")
+    parser.add_argument("--profile", help="serve this profile's shard instead of --data")
+    parser.add_argument("--profiles-dir", default=PROFILE_DIR)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--token", help="require 'Authorization: Bearer TOKEN'")
+    args = parser.parse_args(argv)
+    data_file = args.data
+    if args.profile:
+        try:
+            data_file = profile_path(args.profiles_dir, args.profile)
+        except ValueError as e:
+            parser.error(str(e))
+
+    tracker = HabitTracker(data_file)
+    tracker.start()
+    try:
+        asyncio.run(serve(tracker, args.host, args.port, args.token))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        tracker.close()
+        sys.stderr.write("server stopped\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Compact binary snapshot of a habit history (``<csv>.hbs``).
+
+Layout, all little-endian except the day arrays, which use the byte order
+recorded in the header:
+
+    header   magic, version, byte order, habit count, section offsets and
+             the (size, mtime) of the CSV and side log it was built from
+    table    one entry per habit: name offset/length, goal, first day, count
+    names    UTF-8 habit names, each stored once
+    days     int32 day ordinals, sorted, one contiguous run per habit
+
+The file is opened with ``mmap`` and each habit's days are a ``memoryview``
+cast straight onto the mapping, so opening a large history copies nothing
+until the days are actually read.
+
+    python habit_snapshot.py to-snapshot habits_data.csv habits_data.csv.hbs
+    python habit_snapshot.py to-csv habits_data.csv.hbs restored.csv
+"""
+import argparse
+import csv
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import date
+
+from habit_log import FIELDNAMES
+from habit_registry import Habit
+
+MAGIC = b'HBS1'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIQQQQqQq')
+ENTRY = struct.Struct('<IIiQQ')
+BYTE_ORDERS = {'little': 0, 'big': 1}
+
+
+def source_signature(csv_file):
+    """(size, mtime_ns) of the CSV and its side log; (0, 0) when missing"""
+    signature = []
+    for path in (csv_file, csv_file + ".wal"):
+        try:
+            st = os.stat(path)
+            signature += [st.st_size, st.st_mtime_ns]
+        except OSError:
+            signature += [0, 0]
+    return tuple(signature)
+
+
+def _align(offset, size=8):
+    return (offset + size - 1) // size * size
+
+
+def write_snapshot(path, habits, store, signature=(0, 0, 0, 0)):
+    """Write Habit records and their days from a CompletionStore to ``path``"""
+    names = bytearray()
+    entries = []
+    days = array('i')
+    for habit in habits:
+        encoded = habit.name.encode('utf-8')
+        ordinals = store.ordinals(habit.name)
+        entries.append((len(names), len(encoded), int(habit.goal), len(days), len(ordinals)))
+        names += encoded
+        days.extend(ordinals)
+
+    table_offset = HEADER.size
+    names_offset = table_offset + ENTRY.size * len(entries)
+    days_offset = _align(names_offset + len(names))
+    header = HEADER.pack(MAGIC, VERSION, BYTE_ORDERS[sys.byteorder], len(entries),
+                         table_offset, names_offset, days_offset, *signature)
+
+    tmp_file = path + ".tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(header)
+        for entry in entries:
+            f.write(ENTRY.pack(*entry))
+        f.write(names)
+        f.write(b'\0' * (days_offset - names_offset - len(names)))
+        days.tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+def read_signature(path):
+    """Source signature stored in a snapshot header, or None if unreadable"""
+    try:
+        with open(path, 'rb') as f:
+            fields = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    if fields[0] != MAGIC or fields[1] != VERSION:
+        return None
+    return fields[7:]
+
+
+class HabitSnapshot:
+    """Read-only, memory-mapped view of a snapshot file"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, byte_order, count, table_offset, names_offset, days_offset,
+         *signature) = HEADER.unpack_from(self.mm)
+        if magic != MAGIC or version != VERSION:
+            self.mm.close()
+            raise ValueError(f"{path} is not a habit snapshot")
+        if byte_order != BYTE_ORDERS[sys.byteorder]:
+            self.mm.close()
+            raise ValueError(f"{path} was written on a machine with another byte order")
+        self.signature = tuple(signature)
+        self.entries = [ENTRY.unpack_from(self.mm, table_offset + i * ENTRY.size)
+                        for i in range(count)]
+        self.names_offset = names_offset
+        self.days_offset = days_offset
+        self._views = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        self.mm.close()
+
+    def _name(self, entry):
+        start = self.names_offset + entry[0]
+        return self.mm[start:start + entry[1]].decode('utf-8')
+
+    def habits(self):
+        return [Habit(self._name(e), e[2]) for e in self.entries]
+
+    def ordinals(self):
+        """Yield (habit name, int32 memoryview of its day ordinals)"""
+        raw = memoryview(self.mm)
+        self._views.append(raw)
+        for entry in self.entries:
+            start = self.days_offset + entry[3] * 4
+            days = raw[start:start + entry[4] * 4].cast('i')
+            self._views.append(days)
+            yield self._name(entry), days
+
+
+def open_fresh(path, csv_file):
+    """The snapshot at ``path`` if it was built from the CSV as it is now"""
+    if read_signature(path) != source_signature(csv_file):
+        return None
+    try:
+        return HabitSnapshot(path)
+    except (OSError, ValueError):
+        return None
+
+
+def csv_to_snapshot(csv_file, snapshot_file):
+    """Convert a habits CSV (and its side log) to a snapshot; the source
+    files are only read"""
+    from completion_store import CompletionStore
+    from habit_log import HabitLog
+    from storage import read_csv_habits
+    if not os.path.exists(csv_file):
+        # HabitLog would start an empty one
+        raise FileNotFoundError(f"{csv_file} does not exist")
+    store = CompletionStore()
+    store.load(HabitLog(csv_file).iter_marks())
+    habits = read_csv_habits(csv_file)
+    # Habits that only appear in mark rows still get a table entry
+    defined = {h.name for h in habits}
+    habits += [Habit(name, 0) for name in store.habit_names() if name not in defined]
+    write_snapshot(snapshot_file, habits, store, source_signature(csv_file))
+
+
+def snapshot_to_csv(snapshot_file, csv_file):
+    """Write a snapshot back out in the ['habit', 'goal', 'date', 'completed'] schema"""
+    with HabitSnapshot(snapshot_file) as snapshot, open(csv_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDNAMES)
+        habits = snapshot.habits()
+        for habit in habits:
+            writer.writerow([habit.name, habit.goal, '', ''])
+        for habit, (name, days) in zip(habits, snapshot.ordinals()):
+            writer.writerows([name, habit.goal, date.fromordinal(o).isoformat(), 1]
+                             for o in days)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert between habit CSV and binary snapshots")
+    parser.add_argument("direction", choices=["to-snapshot", "to-csv"])
+    parser.add_argument("source")
+    parser.add_argument("target")
+    args = parser.parse_args()
+    if args.direction == "to-snapshot":
+        csv_to_snapshot(args.source, args.target)
+    else:
+        snapshot_to_csv(args.source, args.target)
@@ -0,0 +1,71 @@
+import calendar
+from collections import OrderedDict
+
+from completion_store import popcount
+from perf import monitor
+
+WEEKDAYS = ['M', 'T', 'W', 'T', 'F', 'S', 'S']
+
+
+class MonthView:
+    """Everything the grid needs to paint one month"""
+
+    __slots__ = ('year', 'month', 'days_in_month', 'day_headers', 'bitmaps', 'counts')
+
+    def __init__(self, year, month, days_in_month, day_headers, bitmaps, counts):
+        self.year = year
+        self.month = month
+        self.days_in_month = days_in_month
+        # [(day number, weekday initial), ...]
+        self.day_headers = day_headers
+        # habit -> int with bit (day - 1) set for every completed day
+        self.bitmaps = bitmaps
+        # habit -> completed days this month
+        self.counts = counts
+
+    def is_completed(self, habit_name, day):
+        return (self.bitmaps.get(habit_name, 0) >> (day - 1)) & 1 == 1
+
+
+def build_month_view(year, month, habits, store):
+    """Slice one month out of a CompletionStore's per-habit bitsets"""
+    days_in_month = calendar.monthrange(year, month)[1]
+    first_weekday = calendar.weekday(year, month, 1)
+    day_headers = [(day, WEEKDAYS[(first_weekday + day - 1) % 7])
+                   for day in range(1, days_in_month + 1)]
+
+    bitmaps = {}
+    counts = {}
+    for habit in habits:
+        bitmap = store.month_bits(habit.name, year, month, days_in_month)
+        bitmaps[habit.name] = bitmap
+        counts[habit.name] = popcount(bitmap)
+    return MonthView(year, month, days_in_month, day_headers, bitmaps, counts)
+
+
+class MonthViewCache:
+    """LRU cache of MonthView objects keyed by (year, month)"""
+
+    def __init__(self, build, capacity=12):
+        self.build = build
+        self.capacity = capacity
+        self.views = OrderedDict()
+
+    def get(self, year, month):
+        key = (year, month)
+        view = self.views.get(key)
+        if view is None:
+            with monitor.phase('month_view'):
+                view = self.views[key] = self.build(year, month)
+            if len(self.views) > self.capacity:
+                self.views.popitem(last=False)
+        else:
+            self.views.move_to_end(key)
+        return view
+
+    def invalidate(self, year=None, month=None):
+        """Drop one month, or every month when called without arguments"""
+        if year is None:
+            self.views.clear()
+        else:
+            self.views.pop((year, month), None)
@@ -0,0 +1,224 @@
+"""Timing hooks, counters and a profiling switch for finding where time goes.
+
+Everything goes through the module-level ``monitor``. It is off by default,
+and while it is off ``phase()`` hands back a shared no-op context manager
+and ``count()`` returns straight away, so the hooks can stay in hot paths.
+
+    HABIT_PERF=1 python main.py                 # record; F12 toggles the overlay
+    HABIT_PROFILE=session.prof python main.py   # also cProfile the whole session
+
+F11 starts and stops a cProfile recording (``habit_session.prof``) at any
+point, e.g. around one slow interaction.
+
+Phases and counters may be recorded from the worker thread as well as the Tk
+thread. The report is printed to stderr when the app closes.
+"""
+import cProfile
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+SAMPLES = 1000
+CLICK_TO_PAINT = 'click_to_paint'
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100.0 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class _NoPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Phase:
+    __slots__ = ('monitor', 'name', 'start')
+
+    def __init__(self, monitor, name):
+        self.monitor = monitor
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.monitor.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+class PerfMonitor:
+    """Phase durations (last ``SAMPLES`` per phase) and running counters"""
+
+    def __init__(self):
+        self.enabled = False
+        self.samples = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.profiler = None
+        self.profile_file = None
+
+    def enable(self):
+        self.enabled = True
+
+    def phase(self, name):
+        """``with monitor.phase('grid'):`` times the block when enabled"""
+        return _Phase(self, name) if self.enabled else _NO_PHASE
+
+    def record(self, name, seconds):
+        with self.lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=SAMPLES)
+            samples.append(seconds)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def stats(self, name):
+        """(samples, p50 ms, p95 ms, max ms) for one phase"""
+        with self.lock:
+            samples = list(self.samples.get(name, ()))
+        return (len(samples), percentile(samples, 50) * 1000, percentile(samples, 95) * 1000,
+                max(samples, default=0.0) * 1000)
+
+    def report(self):
+        """Phases slowest-first by p95, then counters, as plain text"""
+        with self.lock:
+            names = list(self.samples)
+            counters = dict(self.counters)
+        rows = sorted((self.stats(name) + (name,) for name in names),
+                      key=lambda row: (row[4] != CLICK_TO_PAINT, -row[2]))
+        lines = [f"{'phase':18} {'n':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}"]
+        for n, p50, p95, worst, name in rows:
+            lines.append(f"{name:18} {n:6d} {p50:8.1f} {p95:8.1f} {worst:8.1f}")
+        for name in sorted(counters):
+            lines.append(f"{name:18} {counters[name]:6d}")
+        return "\n".join(lines)
+
+    # cProfile
+
+    def start_profile(self, profile_file):
+        if self.profiler is None:
+            self.profile_file = profile_file
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop_profile(self):
+        """Stop recording and write the dump; returns its path"""
+        if self.profiler is None:
+            return None
+        self.profiler.disable()
+        self.profiler.dump_stats(self.profile_file)
+        self.profiler = None
+        return self.profile_file
+
+    def configure_from_env(self):
+        """Apply HABIT_PERF / HABIT_PROFILE from the environment"""
+        if os.environ.get('HABIT_PERF') or os.environ.get('HABIT_PROFILE'):
+            self.enable()
+        if os.environ.get('HABIT_PROFILE'):
+            self.start_profile(os.environ['HABIT_PROFILE'])
+
+    def finish(self, out=sys.stderr):
+        """Write the profile dump and print the report, if anything was recorded"""
+        dump = self.stop_profile()
+        if self.enabled:
+            out.write(self.report() + "\n")
+        if dump:
+            out.write(f"cProfile dump written to {dump}\n")
+
+
+monitor = PerfMonitor()
+
+
+class ClickTimer:
+    """Measures click-to-paint: from a click until Tk has redrawn after it"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def click(self):
+        if not monitor.enabled:
+            return
+        start = time.perf_counter()
+        self.root.after_idle(self._painted, start)
+
+    def _painted(self, start):
+        # Run the redraws still queued behind this callback before stopping the clock
+        self.root.update_idletasks()
+        monitor.record(CLICK_TO_PAINT, time.perf_counter() - start)
+
+
+class PerfOverlay:
+    """Small always-on-top window with the live report; F12 toggles it and
+    F11 starts/stops a cProfile recording"""
+
+    REFRESH_MS = 500
+    PROFILE_FILE = "habit_session.prof"
+
+    def __init__(self, root):
+        self.root = root
+        self.window = None
+        self.label = None
+        self._job = None
+        root.bind_all("<F12>", lambda event: self.toggle())
+        root.bind_all("<F11>", lambda event: self.toggle_profile())
+
+    def toggle_profile(self):
+        if monitor.profiler is None:
+            monitor.enable()
+            monitor.start_profile(self.PROFILE_FILE)
+            sys.stderr.write("cProfile recording started\n")
+        else:
+            sys.stderr.write(f"cProfile dump written to {monitor.stop_profile()}\n")
+
+    def toggle(self):
+        if self.window is None:
+            self.show()
+        else:
+            self.hide()
+
+    def show(self):
+        import tkinter as tk
+        monitor.enable()
+        self.window = tk.Toplevel(self.root)
+        self.window.title("Performance")
+        self.window.attributes("-topmost", True)
+        self.window.protocol("WM_DELETE_WINDOW", self.hide)
+        self.label = tk.Label(self.window, font=("Courier", 9), justify=tk.LEFT,
+                              anchor="nw", bg="#111111", fg="#e0e0e0", padx=8, pady=8)
+        self.label.pack(fill=tk.BOTH, expand=True)
+        self._update()
+
+    def hide(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        if self.window is not None:
+            self.window.destroy()
+            self.window = self.label = None
+
+    def _update(self):
+        text = monitor.report()
+        if monitor.profiler is not None:
+            text += "\n\n[recording cProfile, F11 to stop]"
+        self.label.configure(text=text)
+        self._job = self.root.after(self.REFRESH_MS, self._update)
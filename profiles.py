@@ -0,0 +1,162 @@
+"""Named profiles, each stored in its own shard file.
+
+    profiles/
+        alice.csv        (plus its .wal, .habits and .hbs side files)
+        bob.db           (a profile can use either backend)
+
+Profiles never share a file, so people running the app from one shared
+directory only contend when they open the same profile. ``ProfileManager``
+keeps the trackers it has loaded, so switching back to a profile reuses its
+in-memory indexes instead of reading the shard again.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from habit_core import HabitTracker
+
+PROFILE_DIR = "profiles"
+EXTENSIONS = ('.csv', '.db', '.sqlite', '.sqlite3')
+NAME_PATTERN = re.compile(r"^\w[\w .-]{0,63}$")
+
+AGGREGATE_COLUMNS = ['habit', 'profiles', 'goal', 'done', 'progress', 'longest_streak']
+
+
+def check_name(name):
+    """Profile names become file names, so keep them to a safe alphabet"""
+    if not NAME_PATTERN.match(name) or name.endswith((' ', '.')):
+        raise ValueError(f"invalid profile name {name!r}")
+    return name
+
+
+def list_profiles(directory=PROFILE_DIR):
+    """Names of the profiles with a shard in ``directory``, sorted"""
+    try:
+        entries = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    names = set()
+    for entry in entries:
+        name, ext = os.path.splitext(entry)
+        if ext.lower() in EXTENSIONS and NAME_PATTERN.match(name):
+            names.add(name)
+    return sorted(names, key=str.lower)
+
+
+def profile_path(directory, name, ext='.csv'):
+    """Shard file of a profile; a new profile gets ``ext``"""
+    check_name(name)
+    for existing in EXTENSIONS:
+        path = os.path.join(directory, name + existing)
+        if os.path.exists(path):
+            return path
+    return os.path.join(directory, name + ext)
+
+
+class ProfileManager:
+    """Loaded trackers by profile name, most recently used last.
+
+    Each profile has its own lock, so loading one profile never waits on
+    another. At most ``max_open`` trackers stay loaded; the least recently
+    used one is closed when another is opened, which also writes its
+    snapshot so reloading it later stays quick.
+    """
+
+    def __init__(self, directory=PROFILE_DIR, max_open=4, ext='.csv'):
+        self.directory = directory
+        self.max_open = max_open
+        self.ext = ext
+        self.trackers = OrderedDict()
+        self.locks = {}
+        # Guards the two dicts above; held only for dict operations
+        self.guard = threading.Lock()
+
+    def names(self):
+        return list_profiles(self.directory)
+
+    def path(self, name):
+        return profile_path(self.directory, name, self.ext)
+
+    def lock(self, name):
+        with self.guard:
+            lock = self.locks.get(name)
+            if lock is None:
+                lock = self.locks[name] = threading.Lock()
+            return lock
+
+    def open(self, name):
+        """Tracker for a profile, loaded on first use and cached after that"""
+        check_name(name)
+        with self.lock(name):
+            with self.guard:
+                tracker = self.trackers.get(name)
+                if tracker is not None:
+                    self.trackers.move_to_end(name)
+                    return tracker
+            os.makedirs(self.directory, exist_ok=True)
+            tracker = HabitTracker(self.path(name))
+            with self.guard:
+                self.trackers[name] = tracker
+                evicted = []
+                while len(self.trackers) > self.max_open:
+                    evicted.append(self.trackers.popitem(last=False))
+        for old_name, old_tracker in evicted:
+            with self.lock(old_name):
+                old_tracker.close()
+        return tracker
+
+    def is_open(self, name):
+        with self.guard:
+            return name in self.trackers
+
+    def close(self):
+        """Close every loaded tracker"""
+        with self.guard:
+            trackers, self.trackers = list(self.trackers.items()), OrderedDict()
+        for name, tracker in trackers:
+            with self.lock(name):
+                tracker.close()
+
+
+# Aggregate view
+
+def _month_report(job):
+    """Runs in a pool process: one profile's month report"""
+    name, path, year, month = job
+    tracker = HabitTracker(path)
+    try:
+        return name, tracker.month_report(year, month)
+    finally:
+        tracker.storage.close()
+
+
+def aggregate(directory, year, month, processes=None):
+    """Month reports of every profile, loaded in parallel worker processes.
+
+    Returns ``(per_profile, merged)``: the report rows of each profile by
+    name, and one row per habit name summed across the profiles that have it.
+    """
+    jobs = [(name, profile_path(directory, name), year, month)
+            for name in list_profiles(directory)]
+    if not jobs:
+        return {}, []
+    # Only the aggregate view needs a process pool
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        per_profile = dict(pool.map(_month_report, jobs))
+    merged = {}
+    for rows in per_profile.values():
+        for row in rows:
+            entry = merged.get(row['habit'])
+            if entry is None:
+                entry = merged[row['habit']] = dict.fromkeys(AGGREGATE_COLUMNS, 0)
+                entry['habit'] = row['habit']
+            entry['profiles'] += 1
+            entry['goal'] += row['goal']
+            entry['done'] += row['done']
+            entry['longest_streak'] = max(entry['longest_streak'], row['longest_streak'])
+    for entry in merged.values():
+        entry['progress'] = int(entry['done'] / entry['goal'] * 100) if entry['goal'] > 0 else 0
+    return per_profile, sorted(merged.values(), key=lambda e: e['habit'].lower())
+
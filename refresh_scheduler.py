@@ -0,0 +1,42 @@
+class RefreshScheduler:
+    """Coalesces refresh requests into one repaint per part.
+
+    Each part (e.g. "grid", "charts") is registered with a callback and a
+    debounce window. Marking a part dirty schedules its callback with
+    ``after_idle`` (no window) or ``after`` (window in ms); further marks
+    before it runs are folded into the same repaint, and with a window they
+    push the repaint back so a burst of clicks ends in a single redraw.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.parts = {}
+        self.pending = {}
+
+    def register(self, part, callback, debounce_ms=0):
+        self.parts[part] = (callback, debounce_ms)
+
+    def mark_dirty(self, *parts):
+        for part in parts:
+            callback, debounce_ms = self.parts[part]
+            job = self.pending.get(part)
+            if job is not None:
+                if not debounce_ms:
+                    continue
+                self.root.after_cancel(job)
+            if debounce_ms:
+                self.pending[part] = self.root.after(debounce_ms, self._run, part)
+            else:
+                self.pending[part] = self.root.after_idle(self._run, part)
+
+    def flush(self, *parts):
+        """Run pending repaints now (all parts if none are given)"""
+        for part in parts or list(self.pending):
+            job = self.pending.get(part)
+            if job is not None:
+                self.root.after_cancel(job)
+                self._run(part)
+
+    def _run(self, part):
+        self.pending.pop(part, None)
+        self.parts[part][0]()
@@ -0,0 +1,339 @@
+import math
+import time
+import tkinter as tk
+from collections import OrderedDict
+
+from perf import monitor
+
+# Rendered chart images kept for reuse; one is about 1.3 MB at the default size
+CHART_CACHE_BYTES = 48 * 1024 * 1024
+# App colours the charts are drawn with
+THEME_COLORS = ('bg_dark', 'bg_medium', 'text', 'text_dim', 'accent',
+                'success', 'warning', 'danger')
+
+
+class ChartCache:
+    """Rendered RGBA buffers by key, least recently used evicted first,
+    holding at most ``max_bytes`` in total"""
+
+    def __init__(self, max_bytes=CHART_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.images = OrderedDict()
+        self.size = 0
+
+    def get(self, key):
+        image = self.images.get(key)
+        if image is not None:
+            self.images.move_to_end(key)
+        return image
+
+    def put(self, key, image):
+        if len(image) > self.max_bytes:
+            return
+        old = self.images.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.images[key] = image
+        self.size += len(image)
+        while self.size > self.max_bytes:
+            _, evicted = self.images.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self):
+        self.images.clear()
+        self.size = 0
+
+
+class StatsPanel:
+    """Statistics charts for the right-hand panel.
+
+    matplotlib and seaborn are imported in ``load()``, which the app schedules
+    after the first grid paint, so the window appears without waiting for the
+    plotting stack. A placeholder label fills the panel until then.
+
+    The axes and their bars are created once and updated in place; they are
+    only rebuilt when the list of habits changes.
+
+    ``flat`` selects the customtkinter look: full habit names, borderless
+    bars on a filled background and a fixed pie palette.
+
+    Every rendered figure is kept as an RGBA buffer, keyed by what the
+    charts show, the figure size and the theme. Drawing numbers that were
+    rendered before copies that buffer to the screen instead of running
+    matplotlib again, and drawing what is already on screen does nothing.
+    """
+
+    def __init__(self, master, app, flat=False):
+        self.master = master
+        self.app = app
+        self.flat = flat
+        self.fig = None
+        self.canvas_plot = None
+        # Persistent artists, rebuilt only when the set of habits changes
+        self.axes = None
+        self.habit_names = None
+        self.progress_bars = []
+        self.recent_bars = []
+        self.streak_bars_longest = []
+        self.streak_bars_current = []
+        self.pie_keys = None
+        self.pie_artists = ([], [], [])
+        # perf_counter() of the oldest draw() still waiting for its paint
+        self.draw_requested = None
+        self.cache = ChartCache()
+        # What the artists hold, and (that, width, height) of what is on screen
+        self.content_key = None
+        self.shown_key = None
+        # The caller's key for the data of the last draw()
+        self.data_key = None
+
+        self.placeholder = tk.Label(master, text="Loading charts...", font=("Arial", 10),
+                                    bg=app.bg_dark, fg=app.text_dim)
+        self.placeholder.pack(fill=tk.BOTH, expand=True)
+
+    @property
+    def ready(self):
+        return self.fig is not None
+
+    def load(self):
+        """Import the plotting stack and swap the placeholder for the figure"""
+        if self.ready:
+            return
+        import matplotlib
+        matplotlib.use("TkAgg")
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        import seaborn as sns
+
+        # Set seaborn style
+        sns.set_style("darkgrid")
+        plt.style.use('dark_background')
+        self.plt = plt
+
+        self.placeholder.destroy()
+        self.fig = Figure(figsize=(4, 8), facecolor=self.app.bg_dark)
+        self.canvas_plot = FigureCanvasTkAgg(self.fig, master=self.master)
+        self.canvas_plot.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.canvas_plot.mpl_connect('draw_event', self._on_drawn)
+
+    def shows(self, data_key):
+        """True if the last draw() was given ``data_key`` and is still on
+        screen, so drawing the same data again can be skipped"""
+        return data_key is not None and data_key == self.data_key and self.painted
+
+    @property
+    def painted(self):
+        """True once what the artists hold is on screen"""
+        return self.shown_key == self._image_key()
+
+    def draw(self, habits, monthly_progress, last_3_days, momentum, streaks, data_key=None):
+        """Push new numbers into the existing artists and schedule a redraw
+
+        ``streaks`` maps habit name -> (current, longest) streak in days.
+        ``data_key`` identifies the data these numbers came from, for
+        ``shows``.
+        """
+        key = (tuple(getattr(self.app, name, None) for name in THEME_COLORS),
+               tuple((h.name, h.goal) for h in habits),
+               tuple(monthly_progress.get(h.name, 0) for h in habits),
+               tuple(last_3_days.get(h.name, 0) for h in habits),
+               tuple(momentum.items()),
+               tuple(streaks.get(h.name, (0, 0)) for h in habits))
+        self.data_key = data_key
+        if key != self.content_key:
+            with monitor.phase('chart_update'):
+                self._update_artists(habits, monthly_progress, last_3_days, momentum, streaks)
+            self.content_key = key
+        image_key = self._image_key()
+        if image_key == self.shown_key:
+            monitor.count('chart_unchanged')
+            return
+        image = self.cache.get(image_key)
+        if image is not None:
+            self._blit(image_key, image)
+            return
+        if monitor.enabled and self.draw_requested is None:
+            self.draw_requested = time.perf_counter()
+        self.canvas_plot.draw_idle()
+
+    def _image_key(self):
+        width, height = self.fig.bbox.size
+        return self.content_key, int(width), int(height)
+
+    def _blit(self, image_key, image):
+        """Put a cached rendering on screen without drawing the figure"""
+        start = time.perf_counter() if monitor.enabled else None
+        renderer = self.canvas_plot.get_renderer()
+        buffer = renderer.buffer_rgba()
+        if buffer.nbytes != len(image):
+            # Resized since the key was taken; let matplotlib draw instead
+            self.canvas_plot.draw_idle()
+            return
+        buffer.cast('B')[:] = image
+        self.canvas_plot.blit()
+        self.shown_key = image_key
+        if start is not None:
+            monitor.record('chart_blit', time.perf_counter() - start)
+
+    def _on_drawn(self, event):
+        if self.draw_requested is not None:
+            monitor.record('chart_paint', time.perf_counter() - self.draw_requested)
+            self.draw_requested = None
+        # Also runs for redraws matplotlib does itself, e.g. on resize
+        image_key = self._image_key()
+        self.shown_key = image_key
+        if self.content_key is not None:
+            self.cache.put(image_key, bytes(event.renderer.buffer_rgba()))
+
+    def _update_artists(self, habits, monthly_progress, last_3_days, momentum, streaks):
+        app = self.app
+        names = [h.name for h in habits]
+        if self.axes is None or names != self.habit_names:
+            self._build_axes(names)
+
+        # Monthly Progress
+        progress_pct = []
+        for h in habits:
+            completed = monthly_progress.get(h.name, 0)
+            pct = (completed / h.goal) * 100 if h.goal > 0 else 0
+            progress_pct.append(pct)
+        for bar, pct in zip(self.progress_bars, progress_pct):
+            bar.set_width(pct)
+            bar.set_facecolor(app.danger if pct < 30 else app.warning if pct < 70 else app.success)
+
+        # Last 3 Days
+        days_data = [last_3_days.get(name, 0) for name in names]
+        for bar, days in zip(self.recent_bars, days_data):
+            bar.set_width(days)
+        self.axes[1].set_xlim(0, max(days_data + [1]) * 1.05)
+
+        # Streaks: longest as a faint bar, current on top of it
+        current = [streaks.get(name, (0, 0))[0] for name in names]
+        longest = [streaks.get(name, (0, 0))[1] for name in names]
+        for bar, days in zip(self.streak_bars_longest, longest):
+            bar.set_width(days)
+        for bar, days in zip(self.streak_bars_current, current):
+            bar.set_width(days)
+        self.axes[2].set_xlim(0, max(longest + [1]) * 1.05)
+
+        # Momentum (pie chart)
+        self._update_pie(momentum)
+
+    def _build_axes(self, names):
+        """(Re)create the bar artists; only needed when the habit list changes"""
+        app = self.app
+        if self.axes is None:
+            gs = self.fig.add_gridspec(4, 1, hspace=0.55, top=0.95, bottom=0.05)
+            self.axes = [self.fig.add_subplot(gs[i]) for i in range(4)]
+            if self.flat:
+                self.fig.patch.set_facecolor(app.bg_dark)
+        ax1, ax2, ax3, ax4 = self.axes
+        self.habit_names = names
+        positions = range(len(names))
+
+        ax1.cla()
+        self.progress_bars = list(ax1.barh(positions, [0] * len(names), **self._bar_style()))
+        ax1.set_yticks(positions, self._labels(names, 12))
+        ax1.set_xlabel('Progress (%)', color=app.text, fontsize=9)
+        ax1.set_title('MONTHLY PROGRESS', color=app.text, fontsize=11, fontweight='bold', pad=10)
+        ax1.set_xlim(0, 100)
+        self._style_axes(ax1)
+
+        ax2.cla()
+        self.recent_bars = list(ax2.barh(positions, [0] * len(names), color=app.accent,
+                                         **self._bar_style()))
+        ax2.set_yticks(positions, self._labels(names, 12))
+        ax2.set_xlabel('Days Completed', color=app.text, fontsize=9)
+        ax2.set_title('LAST 3 DAYS', color=app.text, fontsize=11, fontweight='bold', pad=10)
+        self._style_axes(ax2)
+
+        ax3.cla()
+        self.streak_bars_longest = list(ax3.barh(positions, [0] * len(names), color=app.text_dim,
+                                                 **self._bar_style()))
+        self.streak_bars_current = list(ax3.barh(positions, [0] * len(names), color=app.success,
+                                                 height=0.5, **self._bar_style()))
+        ax3.set_yticks(positions, self._labels(names, 12))
+        ax3.set_xlabel('Days (current / longest)', color=app.text, fontsize=9)
+        ax3.set_title('STREAKS', color=app.text, fontsize=11, fontweight='bold', pad=10)
+        self._style_axes(ax3)
+
+        # Force the pie to be rebuilt against the new habit list
+        self.pie_keys = None
+
+    def _update_pie(self, momentum):
+        app = self.app
+        ax4 = self.axes[3]
+        keys = list(momentum.keys())
+        sizes = list(momentum.values())
+
+        if keys and keys == self.pie_keys:
+            # Same slices: move the existing wedges and labels
+            total = float(sum(sizes))
+            theta = 90.0
+            for wedge, text, autotext, size in zip(*self.pie_artists, sizes):
+                span = 360.0 * size / total
+                wedge.set_theta1(theta)
+                wedge.set_theta2(theta + span)
+                mid = math.radians(theta + span / 2)
+                x, y = math.cos(mid), math.sin(mid)
+                text.set_position((1.1 * x, 1.1 * y))
+                text.set_horizontalalignment('left' if x > 0 else 'right')
+                autotext.set_position((0.6 * x, 0.6 * y))
+                autotext.set_text('%1.0f%%' % (100.0 * size / total))
+                theta += span
+            return
+
+        ax4.cla()
+        self.pie_keys = keys
+        self.pie_artists = ([], [], [])
+        if not keys:
+            ax4.axis('off')
+            return
+
+        labels = self._labels(keys, 10)
+        if self.flat:
+            colors_pie = ['#6366F1', '#8B5CF6', '#22D3EE', '#F43F5E', '#FBBF24'][:len(labels)]
+            wedgeprops = {'linewidth': 0, 'edgecolor': 'none'}
+        else:
+            colors_pie = self.plt.cm.Set3(range(len(labels)))
+            wedgeprops = None
+
+        wedges, texts, autotexts = ax4.pie(sizes, labels=labels, autopct='%1.0f%%',
+                                            colors=colors_pie, startangle=90,
+                                            wedgeprops=wedgeprops)
+        for text in texts:
+            text.set_color(app.text)
+            text.set_fontsize(8)
+        for autotext in autotexts:
+            autotext.set_color('snow' if self.flat else 'white')
+            autotext.set_fontsize(10 if self.flat else 8)
+            autotext.set_fontweight('bold')
+        self.pie_artists = (wedges, texts, autotexts)
+
+        ax4.set_title('MOMENTUM', color=app.text, fontsize=11, fontweight='bold', pad=10)
+        if self.flat:
+            ax4.set_facecolor(app.bg_medium)
+
+    def _labels(self, names, max_length):
+        if self.flat:
+            return names
+        return [self.app.wrap_text(name, max_length) for name in names]
+
+    def _bar_style(self):
+        return {'edgecolor': "none"} if self.flat else {'alpha': 0.8}
+
+    def _style_axes(self, ax):
+        app = self.app
+        ax.tick_params(colors=app.text, labelsize=8)
+        spine_color = app.text_dim if self.flat else app.text
+        if self.flat:
+            ax.set_facecolor(app.bg_medium)
+        ax.spines['bottom'].set_color(spine_color)
+        ax.spines['left'].set_color(spine_color)
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        if self.flat:
+            ax.grid(False)
+        else:
+            ax.grid(axis='x', alpha=0.3)
@@ -0,0 +1,415 @@
+import argparse
+import csv
+import os
+import sqlite3
+import uuid
+
+from completion_store import as_date
+from habit_log import TOMBSTONE, HabitLog
+from habit_registry import Habit
+from habit_snapshot import open_fresh, read_signature, source_signature, write_snapshot
+
+
+class HabitStorage:
+    """Interface shared by the storage backends.
+
+    Habits are Habit records and completions are
+    ``(habit, 'YYYY-MM-DD')`` pairs, matching the CSV schema. Habit
+    definitions are kept apart from the completion log, so listing the
+    habits never reads the history.
+    """
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+    def flush(self):
+        """Write out anything buffered, so a new load sees it"""
+
+    def load_habits(self):
+        raise NotImplementedError
+
+    def iter_completions(self):
+        raise NotImplementedError
+
+    def load_index(self, store):
+        """Fill a CompletionStore with every completion"""
+        store.load(self.iter_completions())
+
+    def save_index(self, habits, store):
+        """Called after close with the final in-memory state; backends that
+        parse text on load can cache it for the next start"""
+
+    def changes(self):
+        """What other processes wrote since the load or the last call, as
+        ``(habits, marks)``, or None if nothing changed. ``habits`` is the
+        full definition list if it changed, else None; ``marks`` is a list of
+        (habit, date_str, completed) in write order, or None if the index has
+        to be reloaded"""
+        return None
+
+    def take_write_error(self):
+        """An error from a write that ran in the background since the last
+        call, or None. Backends that write synchronously raise instead."""
+        return None
+
+    def save_habit(self, name, goal, created, archived):
+        """Insert or update one definition (``created`` is an ISO string or '')"""
+        raise NotImplementedError
+
+    def add_mark(self, name, goal, date_str):
+        raise NotImplementedError
+
+    def remove_mark(self, name, goal, date_str):
+        raise NotImplementedError
+
+    def add_marks(self, rows):
+        """Persist many (name, goal, date_str) marks as one batch"""
+        for name, goal, date_str in rows:
+            self.add_mark(name, goal, date_str)
+
+
+def _habit_from_fields(name, goal, created, archived):
+    return Habit(name, int(goal), as_date(created) if created else None, bool(int(archived or 0)))
+
+
+def _habits_in_rows(rows):
+    """The first definition or mark row of each habit, as a Habit"""
+    habits = {}
+    for row in rows:
+        habit_name = row['habit']
+        if habit_name and habit_name not in habits:
+            habits[habit_name] = Habit(habit_name, int(row['goal']))
+    return list(habits.values())
+
+
+def read_csv_habits(csv_file):
+    """Definitions of an existing CSV data file, without creating, locking or
+    upgrading anything: its ``.habits`` file, or failing that the log rows"""
+    definitions_file = csv_file + ".habits"
+    if not os.path.exists(definitions_file):
+        return _habits_in_rows(HabitLog(csv_file).read_rows())
+    with open(definitions_file, newline='') as f:
+        return [_habit_from_fields(*(row[k] for k in CsvStorage.DEFINITION_FIELDS))
+                for row in csv.DictReader(f)]
+
+
+class CsvStorage(HabitStorage):
+    """The original ``habits_data.csv`` file, written through a HabitLog.
+
+    Definitions live in a small ``<csv>.habits`` file next to it, rewritten
+    whole on each change. Older data files without one get it built once
+    from the definition rows in the log. Both files are read and written
+    under the log's lock file, so several app instances can share them.
+    """
+
+    DEFINITION_FIELDS = ['name', 'goal', 'created', 'archived']
+
+    def __init__(self, csv_file):
+        self.csv_file = csv_file
+        self.snapshot_file = csv_file + ".hbs"
+        self.definitions_file = csv_file + ".habits"
+        self.log = HabitLog(csv_file)
+        # name -> [name, goal, created, archived] as written to the file
+        self.definitions = {}
+        # (size, mtime_ns) of the definitions file as last read or written
+        self.definitions_sig = None
+
+    def start(self):
+        self.log.start()
+
+    def close(self):
+        self.log.close()
+
+    def flush(self):
+        self.log.flush()
+
+    def load_habits(self):
+        with self.log.file_lock:
+            if os.path.exists(self.definitions_file):
+                return [_habit_from_fields(*row) for row in self._read_definitions()]
+            habits = self._scan_habits()
+            self.definitions = {h.name: list(h.fields()) for h in habits}
+            self._write_definitions()
+        return habits
+
+    def _definitions_stat(self):
+        try:
+            st = os.stat(self.definitions_file)
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def _read_definitions(self):
+        with open(self.definitions_file, newline='') as f:
+            rows = [[row[k] for k in self.DEFINITION_FIELDS] for row in csv.DictReader(f)]
+        self.definitions = {row[0]: row for row in rows}
+        self.definitions_sig = self._definitions_stat()
+        return rows
+
+    def _scan_habits(self):
+        """Definitions from the log itself, for files written before the
+        definitions file existed"""
+        snapshot = open_fresh(self.snapshot_file, self.csv_file)
+        if snapshot is not None:
+            with snapshot:
+                return snapshot.habits()
+        return _habits_in_rows(self.log.read_rows())
+
+    def _write_definitions(self):
+        tmp_file = self.definitions_file + ".tmp"
+        with open(tmp_file, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.DEFINITION_FIELDS)
+            writer.writerows([name, goal, created, int(archived)]
+                             for name, goal, created, archived in self.definitions.values())
+        os.replace(tmp_file, self.definitions_file)
+        self.definitions_sig = self._definitions_stat()
+
+    def iter_completions(self):
+        return self.log.iter_marks()
+
+    def load_index(self, store):
+        # Locked so no other process appends or compacts mid-read, which
+        # also makes the side log offset recorded at the end exact
+        with self.log.file_lock:
+            # The binary snapshot skips CSV parsing while it matches the files
+            snapshot = open_fresh(self.snapshot_file, self.csv_file)
+            if snapshot is None:
+                store.load(self.iter_completions())
+            else:
+                with snapshot:
+                    for habit_name, ordinals in snapshot.ordinals():
+                        store.load_ordinals(habit_name, ordinals)
+            self.log.mark_synced()
+
+    def save_index(self, habits, store):
+        with self.log.file_lock:
+            # A snapshot missing another process's rows would be taken as fresh
+            if not self.log.caught_up():
+                return
+            signature = source_signature(self.csv_file)
+            if read_signature(self.snapshot_file) != signature:
+                write_snapshot(self.snapshot_file, habits, store, signature)
+
+    def changes(self):
+        rows, lost = self.log.poll()
+        habits = None
+        if self._definitions_stat() != self.definitions_sig:
+            with self.log.file_lock:
+                habits = [_habit_from_fields(*row) for row in self._read_definitions()]
+        if not rows and not lost and habits is None:
+            return None
+        marks = None
+        if not lost:
+            marks = [(row[0], row[2], row[3] != TOMBSTONE)
+                     for row in rows if len(row) == 4 and row[0] and row[2]]
+        return habits, marks
+
+    def take_write_error(self):
+        return self.log.take_error()
+
+    def save_habit(self, name, goal, created, archived):
+        with self.log.file_lock:
+            if self._definitions_stat() != self.definitions_sig:
+                # Another process saved a habit since; keep its change too
+                self._read_definitions()
+            self.definitions[name] = [name, goal, created, archived]
+            self._write_definitions()
+
+    def add_mark(self, name, goal, date_str):
+        self.log.append(name, goal, date_str, 1)
+
+    def remove_mark(self, name, goal, date_str):
+        self.log.append(name, goal, date_str, TOMBSTONE)
+
+    def add_marks(self, rows):
+        # Flushed and compacted straight away so a long import never piles
+        # up in memory or in the side log, with or without the log's thread
+        self.log.extend([name, goal, date_str, 1] for name, goal, date_str in rows)
+        self.log.flush()
+        if self.log.wal_rows >= self.log.compact_threshold:
+            self.log.compact()
+
+
+class SqliteStorage(HabitStorage):
+    """SQLite file with a habits table and a (habit, date)-indexed log.
+
+    Every mark and unmark is also appended to ``mark_log`` with the id of
+    the connection that made it. Other connections notice a commit through
+    ``PRAGMA data_version`` and read only the entries past their cursor.
+    """
+
+    # mark_log entries kept behind the newest; a reader further back reloads
+    LOG_HISTORY = 10000
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS habits (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            goal INTEGER NOT NULL,
+            created TEXT,
+            archived INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS completions (
+            habit_id INTEGER NOT NULL REFERENCES habits(id),
+            date TEXT NOT NULL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS completions_habit_date
+            ON completions(habit_id, date);
+        CREATE TABLE IF NOT EXISTS mark_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            habit TEXT NOT NULL,
+            date TEXT NOT NULL,
+            completed INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        # Opened on one thread and written from another by the GUI's worker
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self._upgrade_schema()
+        # Tells this connection's own mark_log entries apart from the others'
+        self.source = uuid.uuid4().hex
+        self.data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        self.cursor = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM mark_log").fetchone()[0]
+        # Definition rows as last read, to tell whether a commit touched them
+        self.definition_rows = None
+
+    def _upgrade_schema(self):
+        # Databases created before habits had a creation date and archived flag
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(habits)")}
+        with self.conn:
+            if 'created' not in columns:
+                self.conn.execute("ALTER TABLE habits ADD COLUMN created TEXT")
+            if 'archived' not in columns:
+                self.conn.execute(
+                    "ALTER TABLE habits ADD COLUMN archived INTEGER NOT NULL DEFAULT 0")
+            # Only served date-range queries, which the in-memory index answers
+            self.conn.execute("DROP INDEX IF EXISTS completions_date")
+
+    def close(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM mark_log WHERE id <= "
+                              "(SELECT MAX(id) FROM mark_log) - ?", (self.LOG_HISTORY,))
+        self.conn.close()
+
+    def changes(self):
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self.data_version:
+            return None
+        self.data_version = version
+        first = self.conn.execute("SELECT MIN(id) FROM mark_log").fetchone()[0]
+        rows = self.conn.execute(
+            "SELECT id, source, habit, date, completed FROM mark_log WHERE id > ? ORDER BY id",
+            (self.cursor,)).fetchall()
+        marks = None
+        if first is None or first <= self.cursor + 1:
+            marks = [(habit, date_str, bool(completed))
+                     for _, source, habit, date_str, completed in rows if source != self.source]
+        if rows:
+            self.cursor = rows[-1][0]
+        habits = None
+        definitions = self._definition_rows()
+        if definitions != self.definition_rows:
+            self.definition_rows = definitions
+            habits = [_habit_from_fields(*row) for row in definitions]
+        return habits, marks
+
+    def _definition_rows(self):
+        return self.conn.execute(
+            "SELECT name, goal, created, archived FROM habits ORDER BY id").fetchall()
+
+    def load_habits(self):
+        self.definition_rows = self._definition_rows()
+        return [_habit_from_fields(*row) for row in self.definition_rows]
+
+    def iter_completions(self):
+        return self.conn.execute(
+            "SELECT h.name, c.date FROM completions c JOIN habits h ON h.id = c.habit_id")
+
+    def save_habit(self, name, goal, created, archived):
+        with self.conn:
+            self._upsert_habit(name, goal, created, archived)
+
+    def add_mark(self, name, goal, date_str):
+        with self.conn:
+            habit_id = self._ensure_habit(name, goal)
+            self.conn.execute(
+                "INSERT OR IGNORE INTO completions (habit_id, date) VALUES (?, ?)",
+                (habit_id, date_str))
+            self._log_marks([(name, date_str)], 1)
+
+    def remove_mark(self, name, goal, date_str):
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM completions WHERE date = ? AND "
+                "habit_id = (SELECT id FROM habits WHERE name = ?)", (date_str, name))
+            self._log_marks([(name, date_str)], 0)
+
+    def add_marks(self, rows):
+        # One transaction for the whole batch
+        with self.conn:
+            ids = {}
+            for name, goal, date_str in rows:
+                if name not in ids:
+                    ids[name] = self._ensure_habit(name, goal)
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO completions (habit_id, date) VALUES (?, ?)",
+                ((ids[name], date_str) for name, _, date_str in rows))
+            self._log_marks([(name, date_str) for name, _, date_str in rows], 1)
+
+    def _log_marks(self, pairs, completed):
+        self.conn.executemany(
+            "INSERT INTO mark_log (source, habit, date, completed) VALUES (?, ?, ?, ?)",
+            ((self.source, name, date_str, completed) for name, date_str in pairs))
+
+    def _ensure_habit(self, name, goal):
+        self.conn.execute("INSERT OR IGNORE INTO habits (name, goal) VALUES (?, ?)",
+                          (name, int(goal)))
+        return self.conn.execute("SELECT id FROM habits WHERE name = ?", (name,)).fetchone()[0]
+
+    def _upsert_habit(self, name, goal, created, archived):
+        self.conn.execute(
+            "INSERT INTO habits (name, goal, created, archived) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET goal = excluded.goal, "
+            "created = excluded.created, archived = excluded.archived",
+            (name, int(goal), created or None, int(archived)))
+
+
+def open_storage(path):
+    """Pick a backend from the file extension"""
+    if os.path.splitext(path)[1].lower() in ('.db', '.sqlite', '.sqlite3'):
+        return SqliteStorage(path)
+    return CsvStorage(path)
+
+
+def migrate_csv_to_sqlite(csv_file, db_file):
+    """One-shot import of an existing CSV log into a SQLite file"""
+    source = CsvStorage(csv_file)
+    target = SqliteStorage(db_file)
+    try:
+        with target.conn:
+            for habit in source.load_habits():
+                target._upsert_habit(*habit.fields())
+            ids = dict(target.conn.execute("SELECT name, id FROM habits"))
+            target.conn.executemany(
+                "INSERT OR IGNORE INTO completions (habit_id, date) VALUES (?, ?)",
+                ((ids[name], date_str) for name, date_str in source.iter_completions()))
+    finally:
+        target.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import a habits CSV into SQLite")
+    parser.add_argument("csv_file")
+    parser.add_argument("db_file")
+    args = parser.parse_args()
+    migrate_csv_to_sqlite(args.csv_file, args.db_file)
@@ -0,0 +1,185 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from completion_store import as_date
+
+WINDOWS = (7, 30, 90)
+METRIC_HEADERS = ['STREAK', '7D', '30D', '90D']
+
+
+class HabitRuns:
+    """Runs of consecutive completed days for one habit, as day ordinals"""
+
+    __slots__ = ('starts', 'ends', 'longest')
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.longest = 0
+
+    def add(self, ordinal):
+        """Merge one day into the runs; returns False if it was already there"""
+        starts, ends = self.starts, self.ends
+        i = bisect_right(starts, ordinal) - 1
+        if i >= 0 and ends[i] >= ordinal:
+            return False
+        joins_left = i >= 0 and ends[i] == ordinal - 1
+        joins_right = i + 1 < len(starts) and starts[i + 1] == ordinal + 1
+        if joins_left and joins_right:
+            ends[i] = ends.pop(i + 1)
+            starts.pop(i + 1)
+        elif joins_left:
+            ends[i] = ordinal
+        elif joins_right:
+            starts[i + 1] = ordinal
+            i += 1
+        else:
+            i += 1
+            starts.insert(i, ordinal)
+            ends.insert(i, ordinal)
+        self.longest = max(self.longest, ends[i] - starts[i] + 1)
+        return True
+
+    def remove(self, ordinal):
+        """Take one day out of the runs; returns False if it was not there"""
+        starts, ends = self.starts, self.ends
+        i = bisect_right(starts, ordinal) - 1
+        if i < 0 or ends[i] < ordinal:
+            return False
+        start, end = starts[i], ends[i]
+        if start == end:
+            del starts[i], ends[i]
+        elif ordinal == start:
+            starts[i] = ordinal + 1
+        elif ordinal == end:
+            ends[i] = ordinal - 1
+        else:
+            ends[i] = ordinal - 1
+            starts.insert(i + 1, ordinal + 1)
+            ends.insert(i + 1, end)
+        # Only a shortened longest run needs a rescan
+        if end - start + 1 == self.longest:
+            self.longest = max((e - s + 1 for s, e in zip(starts, ends)), default=0)
+        return True
+
+    def run_ending_at(self, ordinal):
+        """Length of the run that covers ``ordinal`` (0 if it is not completed)"""
+        i = bisect_right(self.starts, ordinal) - 1
+        if i >= 0 and self.ends[i] >= ordinal:
+            return ordinal - self.starts[i] + 1
+        return 0
+
+    def count_between(self, lo, hi):
+        """Completed days with lo <= ordinal <= hi"""
+        first = max(bisect_left(self.ends, lo), 0)
+        last = bisect_right(self.starts, hi)
+        total = 0
+        for i in range(first, last):
+            total += min(self.ends[i], hi) - max(self.starts[i], lo) + 1
+        return total
+
+
+class StreakTracker:
+    """Current/longest streaks and 7/30/90-day rates, kept up to date per mark.
+
+    A mark only touches the runs next to it and the window counters it falls
+    into. The window counters are re-anchored from the runs when the day
+    changes, which costs a few bisects per habit rather than a history scan.
+    """
+
+    def __init__(self, today=None):
+        self.runs = {}
+        self.anchor = as_date(today or date.today()).toordinal()
+        self.window_counts = {}
+
+    @classmethod
+    def from_store(cls, store, today=None):
+        tracker = cls(today)
+        tracker.load(store)
+        return tracker
+
+    def load(self, store):
+        """Replace every run with the completions in a CompletionStore"""
+        self.runs.clear()
+        self.window_counts.clear()
+        for habit_name in store.habit_names():
+            runs = self._runs(habit_name)
+            for ordinal in store.ordinals(habit_name):
+                runs.add(ordinal)
+        self._reanchor(self.anchor)
+
+    def replace(self, other):
+        """Take over the runs and counters of another tracker"""
+        self.runs = other.runs
+        self.window_counts = other.window_counts
+        self.anchor = other.anchor
+
+    def _runs(self, habit_name):
+        runs = self.runs.get(habit_name)
+        if runs is None:
+            runs = self.runs[habit_name] = HabitRuns()
+            self.window_counts[habit_name] = dict.fromkeys(WINDOWS, 0)
+        return runs
+
+    def _reanchor(self, anchor):
+        self.anchor = anchor
+        for habit_name, runs in self.runs.items():
+            self.window_counts[habit_name] = {
+                w: runs.count_between(anchor - w + 1, anchor) for w in WINDOWS}
+
+    def _check_day(self, today):
+        ordinal = as_date(today or date.today()).toordinal()
+        if ordinal != self.anchor:
+            self._reanchor(ordinal)
+        return ordinal
+
+    def add(self, habit_name, day):
+        ordinal = as_date(day).toordinal()
+        if not self._runs(habit_name).add(ordinal):
+            return
+        counts = self.window_counts[habit_name]
+        for w in WINDOWS:
+            if self.anchor - w < ordinal <= self.anchor:
+                counts[w] += 1
+
+    def remove(self, habit_name, day):
+        ordinal = as_date(day).toordinal()
+        runs = self.runs.get(habit_name)
+        if runs is None or not runs.remove(ordinal):
+            return
+        counts = self.window_counts[habit_name]
+        for w in WINDOWS:
+            if self.anchor - w < ordinal <= self.anchor:
+                counts[w] -= 1
+
+    def current_streak(self, habit_name, today=None):
+        """Run ending today, or ending yesterday while today is still open"""
+        ordinal = self._check_day(today)
+        runs = self.runs.get(habit_name)
+        if runs is None:
+            return 0
+        return runs.run_ending_at(ordinal) or runs.run_ending_at(ordinal - 1)
+
+    def longest_streak(self, habit_name):
+        runs = self.runs.get(habit_name)
+        return runs.longest if runs else 0
+
+    def rate(self, habit_name, window, today=None):
+        """Share of the last ``window`` days (including today) completed"""
+        self._check_day(today)
+        counts = self.window_counts.get(habit_name)
+        return counts[window] / float(window) if counts else 0.0
+
+    def metrics(self, habit_name, today=None):
+        """All streak and window numbers for one habit, as a dict"""
+        result = {'current': self.current_streak(habit_name, today),
+                  'longest': self.longest_streak(habit_name)}
+        for w in WINDOWS:
+            result[w] = self.rate(habit_name, w, today)
+        return result
+
+
+def metric_columns(metrics):
+    """Cell texts for the metric columns shown next to PROGRESS"""
+    return ([f"{metrics['current']}/{metrics['longest']}"] +
+            [f"{int(metrics[w] * 100)}%" for w in WINDOWS])
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the top level of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    return str(tmp_path / "habits_data.csv")
+
+
+@pytest.fixture(params=['.csv', '.db'])
+def data_file(request, tmp_path):
+    """A fresh data file for each storage backend"""
+    return str(tmp_path / ("habits_data" + request.param))
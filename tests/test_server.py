@@ -0,0 +1,106 @@
+"""HTTP API responses, ETag revalidation and changes from other writers"""
+import asyncio
+import json
+from datetime import date
+
+import pytest
+
+from habit_core import HabitTracker
+from habit_server import HabitServer
+
+DAY = date(2026, 6, 2)
+
+
+@pytest.fixture
+def tracker(data_file):
+    tracker = HabitTracker(data_file)
+    tracker.add_habit("Run", 10)
+    tracker.mark("Run", DAY)
+    yield tracker
+    tracker.close()
+
+
+def get(server, target, etag=None):
+    headers = {'if-none-match': etag} if etag else {}
+    status, body, extra = server.respond('GET', target, headers)
+    return status, json.loads(body) if body else None, extra.get('ETag')
+
+
+def test_get_routes_and_revalidation(tracker):
+    server = HabitServer(tracker)
+    status, habits, etag = get(server, "/habits")
+    assert status == 200
+    assert habits == [{'habit': "Run", 'goal': 10, 'created': date.today().isoformat(),
+                       'archived': False}]
+    status, report, _ = get(server, "/stats/month?month=2026-06")
+    assert status == 200 and report[0]['done'] == 1
+
+    status, body, same = get(server, "/habits", etag)
+    assert (status, body, same) == (304, None, etag)
+
+    # A mark changes the ETag, so the old one no longer validates
+    status, _, _ = server.respond('POST', "/habits/Run/marks/2026-06-03", {})
+    assert status == 200
+    status, _, new_etag = get(server, "/habits", etag)
+    assert status == 200 and new_etag != etag
+
+
+def test_errors(tracker):
+    server = HabitServer(tracker)
+    assert get(server, "/nope")[0] == 404
+    assert server.respond('POST', "/habits/Walk/marks/2026-06-03", {})[0] == 404
+    assert server.respond('POST', "/habits/Run/marks/June", {})[0] == 400
+    assert get(server, "/stats/recent?days=x")[0] == 400
+    assert server.respond('PUT', "/habits", {})[0] == 405
+
+
+def test_token(tracker):
+    server = HabitServer(tracker, token="s3cret")
+    assert get(server, "/habits")[0] == 401
+    status, _, _ = server.respond('GET', "/habits", {'authorization': "Bearer s3cret"})
+    assert status == 200
+
+
+def test_restart_changes_the_etag(tracker):
+    # Same data and counters, but a new server must not validate the old ETag
+    _, _, etag = get(HabitServer(tracker), "/habits")
+    assert get(HabitServer(tracker), "/habits", etag)[0] == 200
+
+
+async def http_get(port, target, etag=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    head = f"GET {target} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+    if etag:
+        head += f"If-None-Match: {etag}\r\n"
+    writer.write((head + "\r\n").encode())
+    response = await reader.read()
+    writer.close()
+    lines = response.decode().split("\r\n")
+    headers = dict(line.split(": ", 1) for line in lines[1:lines.index("")])
+    return int(lines[0].split()[1]), headers.get('ETag'), lines[-1]
+
+
+def test_etag_changes_when_another_process_writes(tracker, data_file):
+    async def scenario():
+        server = HabitServer(tracker, sync_interval=0.05)
+        _, port = await server.start("127.0.0.1", 0)
+        try:
+            status, etag, body = await http_get(port, "/stats/month?month=2026-06")
+            assert status == 200 and json.loads(body)[0]['done'] == 1
+            assert (await http_get(port, "/stats/month?month=2026-06", etag))[0] == 304
+
+            writer = HabitTracker(data_file)
+            writer.mark("Run", date(2026, 6, 3))
+            writer.close()
+
+            for _ in range(100):
+                status, new_etag, body = await http_get(
+                    port, "/stats/month?month=2026-06", etag)
+                if status == 200:
+                    break
+                await asyncio.sleep(0.05)
+            assert status == 200 and new_etag != etag
+            assert json.loads(body)[0]['done'] == 2
+        finally:
+            await server.close()
+    asyncio.run(scenario())
@@ -0,0 +1,211 @@
+"""Marks survive the side log, compaction, snapshots and import/export"""
+import os
+import time
+from datetime import date
+
+import pytest
+
+from habit_core import HabitTracker
+from habit_io import export_history, import_history
+from habit_snapshot import csv_to_snapshot, open_fresh, snapshot_to_csv
+
+JAN = [date(2026, 1, day) for day in (1, 2, 3, 10, 31)]
+
+
+def completed(tracker, habit_name):
+    return tracker.completions.dates(habit_name)
+
+
+def test_marks_round_trip(data_file):
+    tracker = HabitTracker(data_file)
+    tracker.add_habit("Run", 10)
+    tracker.add_habit("Read", 20)
+    for day in JAN:
+        tracker.mark("Run", day)
+    tracker.mark("Read", JAN[0])
+    assert not tracker.mark("Run", JAN[0])
+    tracker.close()
+
+    reopened = HabitTracker(data_file)
+    assert [(h.name, h.goal) for h in reopened.habits] == [("Run", 10), ("Read", 20)]
+    assert completed(reopened, "Run") == JAN
+    assert completed(reopened, "Read") == [JAN[0]]
+    reopened.close()
+
+
+def test_compaction_keeps_every_mark(csv_file):
+    tracker = HabitTracker(csv_file)
+    tracker.add_habit("Run", 10)
+    for day in JAN[:3]:
+        tracker.mark("Run", day)
+    log = tracker.storage.log
+    log.flush()
+    log.compact()
+    assert not os.path.exists(log.wal_file)
+
+    # A second round lands in a new side log and is merged into the snapshot
+    for day in JAN[3:]:
+        tracker.mark("Run", day)
+    tracker.add_habit("Read", 5)
+    tracker.mark("Read", JAN[1])
+    log.flush()
+    log.compact()
+    tracker.storage.close()
+
+    with open(csv_file) as f:
+        lines = f.read().splitlines()
+    # Sorted, one row per completion
+    assert lines[1:] == ["Run,10,2026-01-01,1", "Run,10,2026-01-02,1", "Run,10,2026-01-03,1",
+                         "Run,10,2026-01-10,1", "Run,10,2026-01-31,1", "Read,5,2026-01-02,1"]
+    reopened = HabitTracker(csv_file)
+    assert completed(reopened, "Run") == JAN
+    assert completed(reopened, "Read") == [JAN[1]]
+    reopened.storage.close()
+
+
+def test_compaction_sorts_an_old_unsorted_file(csv_file):
+    with open(csv_file, 'w') as f:
+        f.write("habit,goal,date,completed\n"
+                "Run,10,,\nRun,10,2026-01-03,\nRead,5,,\n"
+                "Run,10,2026-01-01,\nRead,5,2026-01-02,\nRun,10,2026-01-01,\n")
+    tracker = HabitTracker(csv_file)
+    tracker.storage.log.compact()
+    tracker.storage.close()
+    with open(csv_file) as f:
+        lines = f.read().splitlines()
+    assert lines[1:] == ["Run,10,,", "Run,10,2026-01-01,", "Run,10,2026-01-03,",
+                         "Read,5,,", "Read,5,2026-01-02,"]
+
+
+def test_snapshot_is_used_until_the_csv_changes(csv_file):
+    tracker = HabitTracker(csv_file)
+    tracker.add_habit("Run", 10)
+    tracker.mark("Run", JAN[0])
+    tracker.close()
+    snapshot_file = csv_file + ".hbs"
+    snapshot = open_fresh(snapshot_file, csv_file)
+    assert snapshot is not None
+    snapshot.close()
+
+    # Another writer appends to the side log: the snapshot no longer matches
+    with open(csv_file + ".wal", 'a') as f:
+        f.write("Run,10,2026-01-02,1\n")
+    assert open_fresh(snapshot_file, csv_file) is None
+    reopened = HabitTracker(csv_file)
+    assert completed(reopened, "Run") == JAN[:2]
+    reopened.close()
+    # Closing rewrote it for the new state
+    snapshot = open_fresh(snapshot_file, csv_file)
+    assert snapshot is not None
+    snapshot.close()
+
+
+def test_export_import_round_trip(data_file, tmp_path):
+    tracker = HabitTracker(data_file)
+    tracker.add_habit("Run", 10)
+    tracker.add_habit("Read", 5)
+    tracker.archive_habit("Read")
+    for day in JAN:
+        tracker.mark("Run", day)
+    tracker.mark("Read", JAN[2])
+
+    for name in ("export.csv", "export.jsonl"):
+        path = str(tmp_path / name)
+        export_history(tracker, path, chunk_size=2)
+        target = HabitTracker(str(tmp_path / (name + ".target.csv")))
+        progress = import_history(target, path, chunk_size=2)
+        assert progress.added == len(JAN) + 1
+        assert completed(target, "Run") == JAN
+        assert completed(target, "Read") == [JAN[2]]
+        target.close()
+    tracker.close()
+
+
+def test_import_without_the_log_thread_compacts(csv_file, tmp_path):
+    # habit_cli.py never starts the background thread
+    source = tmp_path / "export.csv"
+    lines = ["habit,goal,date,completed"]
+    lines += [f"Run,10,{date.fromordinal(JAN[0].toordinal() + i)},1" for i in range(1200)]
+    source.write_text("\n".join(lines) + "\n")
+    tracker = HabitTracker(csv_file)
+    log = tracker.storage.log
+    import_history(tracker, str(source), chunk_size=100)
+    assert log.wal_rows < log.compact_threshold
+    with open(csv_file) as f:
+        assert sum(1 for _ in f) > 1000
+    tracker.close()
+
+    reopened = HabitTracker(csv_file)
+    assert len(completed(reopened, "Run")) == 1200
+    reopened.close()
+
+
+def test_failed_flush_keeps_the_rows(csv_file, monkeypatch):
+    tracker = HabitTracker(csv_file)
+    tracker.add_habit("Run", 10)
+    log = tracker.storage.log
+    tracker.mark("Run", JAN[0])
+
+    def disk_full(fd):
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(os, 'fsync', disk_full)
+    with pytest.raises(OSError):
+        log.flush()
+    tracker.mark("Run", JAN[1])
+    assert [row[2] for row in log.pending] == ["2026-01-01", "2026-01-02"]
+    # Nothing half-written was left behind
+    assert not os.path.exists(log.wal_file) or os.path.getsize(log.wal_file) == 0
+
+    monkeypatch.undo()
+    tracker.close()
+    reopened = HabitTracker(csv_file)
+    assert completed(reopened, "Run") == JAN[:2]
+    reopened.close()
+
+
+def test_background_flush_survives_and_reports_failures(csv_file, monkeypatch):
+    tracker = HabitTracker(csv_file)
+    tracker.add_habit("Run", 10)
+    log = tracker.storage.log
+    log.flush_interval = 0.01
+    failures = []
+
+    def disk_full(fd):
+        failures.append(fd)
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(os, 'fsync', disk_full)
+    tracker.start()
+    tracker.mark("Run", JAN[0])
+    while len(failures) < 3:
+        time.sleep(0.01)
+    # Reported once for the whole run of failures
+    assert isinstance(tracker.storage.take_write_error(), OSError)
+    assert tracker.storage.take_write_error() is None
+
+    monkeypatch.undo()
+    while log.pending:
+        time.sleep(0.01)
+    tracker.close()
+    reopened = HabitTracker(csv_file)
+    assert completed(reopened, "Run") == [JAN[0]]
+    reopened.close()
+
+
+def test_snapshot_conversion_only_reads_its_source(tmp_path):
+    source = tmp_path / "old.csv"
+    source.write_text("habit,goal,date,completed\nRun,10,,\nRun,10,2026-01-02,1\n"
+                      "Read,5,2026-01-03,1\n")
+    (tmp_path / "old.csv.wal").write_text("Run,10,2026-01-04,1\nRead,5,2026-01-03,0\n")
+    before = {p.name: p.read_bytes() for p in tmp_path.iterdir()}
+
+    csv_to_snapshot(str(source), str(tmp_path / "out.hbs"))
+    after = {p.name: p.read_bytes() for p in tmp_path.iterdir() if p.name != "out.hbs"}
+    assert after == before
+    snapshot_to_csv(str(tmp_path / "out.hbs"), str(tmp_path / "back.csv"))
+    assert (tmp_path / "back.csv").read_text().splitlines() == [
+        "habit,goal,date,completed", "Run,10,,", "Read,5,,",
+        "Run,10,2026-01-02,1", "Run,10,2026-01-04,1"]
+
+    with pytest.raises(FileNotFoundError):
+        csv_to_snapshot(str(tmp_path / "missing.csv"), str(tmp_path / "missing.hbs"))
+    assert not (tmp_path / "missing.csv").exists()
@@ -0,0 +1,180 @@
+"""Two instances on one data file see each other's writes"""
+import os
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+from habit_core import HabitTracker
+
+DAY = date(2026, 5, 1)
+
+
+def flush(tracker):
+    """Push buffered CSV rows to the side log (SQLite commits right away)"""
+    log = getattr(tracker.storage, 'log', None)
+    if log is not None:
+        log.flush()
+
+
+def pull(tracker):
+    return tracker.apply_changes(tracker.storage.changes())
+
+
+def test_marks_unmarks_and_habits_reach_the_other_instance(data_file):
+    a = HabitTracker(data_file)
+    b = HabitTracker(data_file)
+    assert not pull(b)
+
+    a.add_habit("Run", 10)
+    a.mark("Run", DAY)
+    a.mark("Run", DAY + timedelta(days=1))
+    flush(a)
+    assert pull(b)
+    assert b.habit("Run").goal == 10
+    assert b.completions.dates("Run") == [DAY, DAY + timedelta(days=1)]
+
+    a.unmark("Run", DAY)
+    b.mark("Run", DAY + timedelta(days=5))
+    flush(a)
+    flush(b)
+    assert pull(a) and pull(b)
+    expected = [DAY + timedelta(days=1), DAY + timedelta(days=5)]
+    assert a.completions.dates("Run") == b.completions.dates("Run") == expected
+    assert b.streaks.current_streak("Run", DAY + timedelta(days=5)) == 1
+
+    b.archive_habit("Run")
+    assert pull(a)
+    assert a.habits == []
+    a.close()
+    b.close()
+
+
+def test_marks_alone_do_not_resend_definitions(data_file):
+    a = HabitTracker(data_file)
+    a.add_habit("Run", 10)
+    b = HabitTracker(data_file)
+    a.mark("Run", DAY)
+    flush(a)
+    habits, marks = b.storage.changes()
+    assert habits is None
+    assert marks == [("Run", DAY.isoformat(), True)]
+    a.close()
+    b.close()
+
+
+def test_reader_behind_a_compaction_catches_up(csv_file):
+    a = HabitTracker(csv_file)
+    a.add_habit("Run", 10)
+    b = HabitTracker(csv_file)
+    a.mark("Run", DAY)
+    flush(a)
+    assert pull(b)
+    a.mark("Run", DAY + timedelta(days=1))
+    flush(a)
+    a.storage.log.compact()
+    a.mark("Run", DAY + timedelta(days=2))
+    flush(a)
+
+    # The rest of the rotated side log is read from where b stopped
+    habits, marks = b.storage.changes()
+    assert [day for _, day, _ in marks] == [(DAY + timedelta(days=i)).isoformat()
+                                            for i in (1, 2)]
+    b.apply_changes((habits, marks))
+    assert b.completions.dates("Run") == [DAY + timedelta(days=i) for i in range(3)]
+    a.close()
+    b.close()
+
+
+def test_compaction_seen_without_a_side_log_reloads(csv_file):
+    a = HabitTracker(csv_file)
+    a.add_habit("Run", 10)
+    b = HabitTracker(csv_file)
+    a.mark("Run", DAY)
+    flush(a)
+    a.storage.log.compact()
+    a.mark("Run", DAY + timedelta(days=1))
+    flush(a)
+
+    # b loaded before any side log existed, so it cannot tell whether the
+    # rotated one is the only one it missed
+    _, marks = changes = b.storage.changes()
+    assert marks is None
+    b.apply_changes(changes)
+    assert b.completions.dates("Run") == [DAY, DAY + timedelta(days=1)]
+    a.close()
+    b.close()
+
+
+def test_reload_built_off_the_indexes_keeps_local_marks(data_file):
+    # What the GUI does: load_index on the worker, swap_index on the Tk thread
+    a = HabitTracker(data_file)
+    a.add_habit("Run", 10)
+    a.start()
+    b = HabitTracker(data_file)
+    b.mark("Run", DAY)
+    flush(b)
+    a.mark("Run", DAY + timedelta(days=1))
+    completions, streaks = a.completions, a.streaks
+
+    index = a.load_index()
+    assert a.completions is completions
+    a.swap_index(index)
+    assert a.completions is completions and a.streaks is streaks
+    # a's own mark was still buffered when the load began
+    assert a.completions.dates("Run") == [DAY, DAY + timedelta(days=1)]
+    assert a.streaks.longest_streak("Run") == 2
+    a.close()
+    b.close()
+
+
+def test_reader_that_missed_a_whole_side_log_reloads(csv_file):
+    a = HabitTracker(csv_file)
+    a.add_habit("Run", 10)
+    b = HabitTracker(csv_file)
+    for offset in range(3):
+        a.mark("Run", DAY + timedelta(days=offset))
+        flush(a)
+        a.storage.log.compact()
+
+    _, marks = changes = b.storage.changes()
+    assert marks is None
+    b.apply_changes(changes)
+    assert b.completions.dates("Run") == [DAY + timedelta(days=i) for i in range(3)]
+    a.close()
+    b.close()
+
+
+WRITER = """
+import sys
+from datetime import date, timedelta
+sys.path.insert(0, {root!r})
+from habit_core import HabitTracker
+tracker = HabitTracker({path!r})
+for offset in range({count}):
+    tracker.mark("Run", date(2026, 1, 1) + timedelta(days=offset))
+tracker.close()
+"""
+
+
+def test_writes_from_another_process(data_file):
+    import habit_core
+    root = os.path.dirname(os.path.abspath(habit_core.__file__))
+    tracker = HabitTracker(data_file)
+    tracker.add_habit("Run", 10)
+    tracker.start()
+    writers = [subprocess.Popen([sys.executable, "-c",
+                                 WRITER.format(root=root, path=data_file, count=40)])
+               for _ in range(2)]
+    for writer in writers:
+        assert writer.wait(timeout=60) == 0
+
+    deadline = time.monotonic() + 10
+    while len(tracker.completions.dates("Run")) < 40 and time.monotonic() < deadline:
+        pull(tracker)
+        time.sleep(0.05)
+    assert len(tracker.completions.dates("Run")) == 40
+    tracker.close()
+    reopened = HabitTracker(data_file)
+    assert len(reopened.completions.dates("Run")) == 40
+    reopened.close()
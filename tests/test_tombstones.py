@@ -0,0 +1,75 @@
+"""Unmarking: tombstone rows, their replay on load, and compaction"""
+from datetime import date
+
+from habit_core import HabitTracker
+from habit_log import TOMBSTONE
+
+DAY = date(2026, 3, 14)
+
+
+def test_toggle_flips_a_day(data_file):
+    tracker = HabitTracker(data_file)
+    tracker.add_habit("Run", 10)
+    assert tracker.toggle("Run", DAY) is True
+    assert tracker.completions.is_completed("Run", DAY)
+    assert tracker.toggle("Run", DAY) is False
+    assert not tracker.completions.is_completed("Run", DAY)
+    assert not tracker.unmark("Run", DAY)
+    tracker.close()
+
+
+def test_unmark_survives_reopening(data_file):
+    tracker = HabitTracker(data_file)
+    tracker.add_habit("Run", 10)
+    for day in (1, 2, 3, 4):
+        tracker.mark("Run", date(2026, 3, day))
+    tracker.unmark("Run", date(2026, 3, 2))
+    tracker.close()
+
+    reopened = HabitTracker(data_file)
+    assert reopened.completions.dates("Run") == [date(2026, 3, 1), date(2026, 3, 3),
+                                                 date(2026, 3, 4)]
+    # Streaks are rebuilt from the replayed state, so the gap splits the run
+    assert reopened.streaks.longest_streak("Run") == 2
+    reopened.close()
+
+
+def test_latest_row_wins_on_replay(csv_file):
+    tracker = HabitTracker(csv_file)
+    tracker.add_habit("Run", 10)
+    # mark, unmark, mark again: completed; then a pair that ends unmarked
+    for _ in range(3):
+        tracker.toggle("Run", DAY)
+    tracker.toggle("Run", date(2026, 3, 15))
+    tracker.toggle("Run", date(2026, 3, 15))
+    tracker.storage.close()
+
+    with open(csv_file + ".wal") as f:
+        rows = f.read().splitlines()
+    assert rows.count(f"Run,10,2026-03-14,{TOMBSTONE}") == 1
+    reopened = HabitTracker(csv_file)
+    assert reopened.completions.dates("Run") == [DAY]
+    reopened.storage.close()
+
+
+def test_unmark_of_a_compacted_mark(csv_file):
+    tracker = HabitTracker(csv_file)
+    tracker.add_habit("Run", 10)
+    tracker.mark("Run", DAY)
+    tracker.mark("Run", date(2026, 3, 15))
+    log = tracker.storage.log
+    log.flush()
+    log.compact()
+
+    # The mark is in the snapshot and its tombstone in the new side log
+    tracker.unmark("Run", DAY)
+    tracker.storage.close()
+    reopened = HabitTracker(csv_file)
+    assert reopened.completions.dates("Run") == [date(2026, 3, 15)]
+
+    # Compaction drops the tombstone along with the mark it cancels
+    reopened.storage.log.compact()
+    reopened.storage.close()
+    with open(csv_file) as f:
+        lines = f.read().splitlines()
+    assert lines[1:] == ["Run,10,2026-03-15,1"]
@@ -0,0 +1,62 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Worker:
+    """A background thread for storage I/O and statistics.
+
+    Tasks run one at a time in submission order, so writes reach storage in
+    the order they were made. Finished tasks are put on a thread-safe queue
+    that the Tk thread drains with ``root.after``; callbacks therefore always
+    run on the Tk thread and may touch widgets.
+    """
+
+    def __init__(self, root, poll_ms=15):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="habit-worker")
+        self.results = queue.Queue()
+        self.outstanding = 0
+        self._job = None
+
+    def submit(self, fn, *args, callback=None, errback=None):
+        """Run ``fn(*args)`` off the Tk thread; ``callback(result)`` or
+        ``errback(exception)`` runs on the Tk thread once it finishes"""
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(lambda f: self.results.put((f, callback, errback)))
+        self.outstanding += 1
+        if self._job is None:
+            self._job = self.root.after(self.poll_ms, self._poll)
+        return future
+
+    def busy(self):
+        return self.outstanding > 0
+
+    def shutdown(self):
+        """Finish every queued task (pending writes included) and stop"""
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        self.executor.shutdown(wait=True)
+
+    def _poll(self):
+        self._job = None
+        while True:
+            try:
+                future, callback, errback = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.outstanding -= 1
+            error = future.exception()
+            try:
+                if error is None:
+                    if callback is not None:
+                        callback(future.result())
+                elif errback is not None:
+                    errback(error)
+                else:
+                    raise error
+            except Exception as e:
+                self.root.report_callback_exception(type(e), e, e.__traceback__)
+        if self.outstanding:
+            self._job = self.root.after(self.poll_ms, self._poll)
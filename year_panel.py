@@ -0,0 +1,168 @@
+import tkinter as tk
+from datetime import date
+from tkinter import ttk
+
+from perf import monitor
+
+COMBINED = "All habits combined"
+EVERY_HABIT = "Every habit"
+WEEKDAY_TICKS = ([0, 2, 4, 6], ['Mon', 'Wed', 'Fri', 'Sun'])
+# The habit x day view only labels its rows up to this many habits
+MAX_ROW_LABELS = 40
+
+
+class YearPanel:
+    """Year-at-a-glance heatmap in a window of its own.
+
+    One habit, or the share of all habits done each day, is laid out as a
+    contribution calendar (weekday rows by week columns); "Every habit"
+    shows the whole habit x day matrix instead. Either way the figure holds
+    a single image, built from a YearMatrix that ``refresh`` keeps current
+    row by row. A refresh that changes no cell does not redraw.
+
+    matplotlib and NumPy are imported when the window is first opened.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.window = None
+        self.year = date.today().year
+        self.choice = COMBINED
+        self.matrix = None
+        # (choice, year, habit names) the axes were laid out for
+        self.layout = None
+        self.image = None
+
+    @property
+    def is_open(self):
+        return self.window is not None
+
+    def open(self):
+        if self.window is not None:
+            self.window.deiconify()
+            self.window.lift()
+            return
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.colors import LinearSegmentedColormap
+        from matplotlib.figure import Figure
+
+        app = self.app
+        self.window = tk.Toplevel(app.root, bg=app.bg_dark)
+        self.window.title("Year view")
+        self.window.geometry("1100x420")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        bar = tk.Frame(self.window, bg=app.bg_dark)
+        bar.pack(fill=tk.X, padx=10, pady=(10, 0))
+        tk.Button(bar, text="<", command=lambda: self.shift_year(-1),
+                  bg=app.bg_light, fg=app.text, relief=tk.FLAT, font=("Arial", 10, "bold"),
+                  cursor="hand2", width=3).pack(side=tk.LEFT)
+        self.year_label = tk.Label(bar, font=("Arial", 12, "bold"), bg=app.bg_dark,
+                                   fg=app.text, width=6)
+        self.year_label.pack(side=tk.LEFT, padx=5)
+        tk.Button(bar, text=">", command=lambda: self.shift_year(1),
+                  bg=app.bg_light, fg=app.text, relief=tk.FLAT, font=("Arial", 10, "bold"),
+                  cursor="hand2", width=3).pack(side=tk.LEFT)
+        self.habit_box = ttk.Combobox(bar, state="readonly", width=30)
+        self.habit_box.bind("<<ComboboxSelected>>", lambda event: self.choose(self.habit_box.get()))
+        self.habit_box.pack(side=tk.LEFT, padx=15)
+        self.summary = tk.Label(bar, font=("Arial", 10), bg=app.bg_dark, fg=app.text_dim)
+        self.summary.pack(side=tk.LEFT)
+
+        self.cmap = LinearSegmentedColormap.from_list(
+            'year', [app.bg_light, app.success])
+        # Days not reached yet (and the padding around the year) stay blank
+        self.cmap.set_bad(app.bg_dark)
+        self.fig = Figure(figsize=(11, 3.6), facecolor=app.bg_dark)
+        self.ax = self.fig.add_subplot()
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.window)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.refresh()
+
+    def close(self):
+        if self.window is not None:
+            self.window.destroy()
+        self.window = None
+        self.matrix = None
+        self.layout = None
+        self.image = None
+
+    def shift_year(self, delta):
+        self.year += delta
+        self.refresh()
+
+    def choose(self, choice):
+        self.choice = choice
+        self.refresh()
+
+    def refresh(self):
+        """Catch up with the app's data; redraws only if the image changed"""
+        if self.window is None:
+            return
+        from year_view import YearMatrix
+
+        app = self.app
+        if self.matrix is None or self.matrix.year != self.year:
+            self.matrix = YearMatrix(self.year)
+            self.layout = None
+        with monitor.phase('year_matrix'):
+            changed = self.matrix.update(app.habits, app.completions)
+        names = self.matrix.names
+        if changed or self.layout is None:
+            self.habit_box.configure(values=[COMBINED, EVERY_HABIT] + names)
+        if self.choice not in names and (self.choice != EVERY_HABIT or not names):
+            self.choice = COMBINED
+        self.habit_box.set(self.choice)
+        self.year_label.configure(text=str(self.year))
+
+        layout = (self.choice, self.year, tuple(names) if self.choice == EVERY_HABIT else None)
+        if not changed and layout == self.layout:
+            return
+        with monitor.phase('year_render'):
+            self._render(layout)
+
+    def _render(self, layout):
+        matrix = self.matrix
+        if self.choice == EVERY_HABIT:
+            data = matrix.habit_days()
+            self.summary.configure(text=f"{int(matrix.matrix.sum())} completions")
+        elif self.choice == COMBINED:
+            data = matrix.week_grid(matrix.combined())
+            self.summary.configure(text=f"{int(matrix.matrix.sum())} completions"
+                                        f" across {len(matrix.names)} habits")
+        else:
+            row = matrix.row(self.choice)
+            data = matrix.week_grid(row)
+            self.summary.configure(text=f"{int(row.sum())} days")
+
+        if layout == self.layout:
+            self.image.set_data(data)
+        else:
+            self._build_axes(data)
+            self.layout = layout
+        self.canvas.draw_idle()
+
+    def _build_axes(self, data):
+        """One image for the whole view, plus month and row labels"""
+        app = self.app
+        ax = self.ax
+        ax.cla()
+        ax.set_facecolor(app.bg_dark)
+        every_habit = self.choice == EVERY_HABIT
+        self.image = ax.imshow(data, cmap=self.cmap, vmin=0, vmax=1, interpolation='nearest',
+                               aspect='auto' if every_habit else 'equal')
+        starts = self.matrix.month_starts(weeks=not every_habit)
+        ax.set_xticks([col for col, _ in starts], [label for _, label in starts])
+        if every_habit:
+            names = self.matrix.names
+            if len(names) <= MAX_ROW_LABELS:
+                ax.set_yticks(range(len(names)), [app.wrap_text(name, 18) for name in names])
+            else:
+                ax.set_yticks([])
+        else:
+            ax.set_yticks(*WEEKDAY_TICKS)
+        ax.tick_params(colors=app.text, labelsize=8, length=0)
+        for spine in ax.spines.values():
+            spine.set_visible(False)
+        ax.grid(False)
+        self.fig.tight_layout()
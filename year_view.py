@@ -0,0 +1,97 @@
+import calendar
+from datetime import date
+
+import numpy as np
+
+# Columns of a YearMatrix; the last one stays empty outside leap years
+DAYS = 366
+# Bytes needed to unpack DAYS bits
+BITMAP_BYTES = DAYS // 8 + 1
+
+
+class YearMatrix:
+    """One calendar year of completions as a habit x day matrix.
+
+    Row ``i`` belongs to ``names[i]`` and column ``j`` is day ``j`` of the
+    year (0 = January 1st). Each row remembers the year bitmap it was
+    unpacked from, so ``update`` only touches habits whose days changed:
+    after a click that is one shift-and-mask per habit and one row unpacked.
+    """
+
+    def __init__(self, year):
+        self.year = year
+        self.first = date(year, 1, 1).toordinal()
+        self.days = 366 if calendar.isleap(year) else 365
+        self.names = []
+        self.bitmaps = []
+        self.matrix = np.zeros((0, DAYS), dtype=np.uint8)
+
+    def update(self, habits, store):
+        """Bring the matrix in line with ``store``; returns True if it changed"""
+        names = [h.name for h in habits]
+        changed = names != self.names
+        if changed:
+            # Keep the rows of habits that are still listed, in the new order
+            old_rows = {name: i for i, name in enumerate(self.names)}
+            matrix = np.zeros((len(names), DAYS), dtype=np.uint8)
+            bitmaps = []
+            for i, name in enumerate(names):
+                old = old_rows.get(name)
+                if old is None:
+                    bitmaps.append(0)
+                else:
+                    matrix[i] = self.matrix[old]
+                    bitmaps.append(self.bitmaps[old])
+            self.names, self.bitmaps, self.matrix = names, bitmaps, matrix
+        for i, name in enumerate(names):
+            bitmap = store.year_bits(name, self.year)
+            if bitmap != self.bitmaps[i]:
+                self.bitmaps[i] = bitmap
+                self.matrix[i] = np.unpackbits(
+                    np.frombuffer(bitmap.to_bytes(BITMAP_BYTES, 'little'), dtype=np.uint8),
+                    bitorder='little')[:DAYS]
+                changed = True
+        return changed
+
+    # Views for the heatmap; days after ``today`` and past the year end are NaN
+
+    def _elapsed(self, today=None):
+        """Days of the year up to and including today"""
+        today = (today or date.today()).toordinal()
+        return min(max(today - self.first + 1, 0), self.days)
+
+    def habit_days(self, today=None):
+        """Every habit's row as floats, for the habit x day view"""
+        values = np.full((len(self.names), self.days), np.nan)
+        elapsed = self._elapsed(today)
+        values[:, :elapsed] = self.matrix[:, :elapsed]
+        return values
+
+    def row(self, habit_name):
+        return self.matrix[self.names.index(habit_name)]
+
+    def combined(self):
+        """Share of the habits completed on each day"""
+        if not self.names:
+            return np.zeros(DAYS)
+        return self.matrix.mean(axis=0)
+
+    def week_grid(self, values, today=None):
+        """Lay out one value per day as weekday rows (Monday first) by week
+        columns, the way a contribution calendar does"""
+        offset = date(self.year, 1, 1).weekday()
+        elapsed = self._elapsed(today)
+        cells = offset + np.arange(elapsed)
+        grid = np.full((7, (offset + self.days + 6) // 7), np.nan)
+        grid[cells % 7, cells // 7] = values[:elapsed]
+        return grid
+
+    def month_starts(self, weeks=False):
+        """(column, month abbreviation) of each month's first day; with
+        ``weeks`` the column of a week grid"""
+        offset = date(self.year, 1, 1).weekday() if weeks else 0
+        starts = []
+        for month in range(1, 13):
+            day = date(self.year, month, 1).toordinal() - self.first
+            starts.append(((offset + day) // 7 if weeks else day, calendar.month_abbr[month]))
+        return starts